@@ -2,6 +2,15 @@
 Agents package.
 """
 
+import sys
+from pathlib import Path
+
+# Add project root once for the whole package, so submodules can import
+# tools, schemas, memory, ... without each re-resolving the path
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
 from .profile_agent import ProfileAgent
 from .orchestrator import Orchestrator
 
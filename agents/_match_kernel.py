@@ -0,0 +1,81 @@
+# agents/_match_kernel.py
+"""
+Numeric core of MatchAgent: failed-check counts for a profile against the
+rule threshold table (see match_agent.RULE_COLUMNS).
+
+Missing values are NaN on both sides; a comparison against NaN is False,
+so a missing threshold never counts and a missing profile value only
+counts where the rule requires it.
+"""
+
+import math
+from typing import Any, Tuple
+
+import numpy as np
+
+# Numba (optional) – JIT for the per-rule penalty loop
+try:
+    from numba import njit
+    _NUMBA_AVAILABLE = True
+except Exception:
+    njit = None
+    _NUMBA_AVAILABLE = False
+
+
+def _penalty_loop(
+    age: float,
+    rank: float,
+    ielts: float,
+    funds: float,
+    years: float,
+    table: np.ndarray,
+) -> np.ndarray:
+    """Failed checks per table row, one rule at a time."""
+    n_rows = table.shape[0]
+    out = np.zeros(n_rows, dtype=np.int8)
+    for i in range(n_rows):
+        pen = 0
+        if age < table[i, 0]:
+            pen += 1
+        if age > table[i, 1]:
+            pen += 1
+        req_rank = table[i, 2]
+        if not math.isnan(req_rank) and (rank < 0 or rank < req_rank):
+            pen += 1
+        for j, value in ((3, ielts), (4, funds), (5, years)):
+            required = table[i, j]
+            if not math.isnan(required) and (math.isnan(value) or value < required):
+                pen += 1
+        out[i] = pen
+    return out
+
+
+def penalty_counts_np(profile: Tuple[Any, ...], table: np.ndarray) -> np.ndarray:
+    """
+    Same counts with NumPy array ops.
+
+    profile is (age, degree_rank, ielts, funds, years) – scalars, or arrays
+    that broadcast against the table columns.
+    """
+    age, rank, ielts, funds, years = profile
+    min_age, max_age, req_rank, min_ielts, min_funds, min_years = table.T
+
+    pen = (age < min_age).astype(np.int8)
+    pen += age > max_age
+    pen += ~np.isnan(req_rank) & ((rank < 0) | (rank < req_rank))
+    pen += ~np.isnan(min_ielts) & (np.isnan(ielts) | (ielts < min_ielts))
+    pen += ~np.isnan(min_funds) & (np.isnan(funds) | (funds < min_funds))
+    pen += ~np.isnan(min_years) & (np.isnan(years) | (years < min_years))
+    return pen
+
+
+if _NUMBA_AVAILABLE:
+    # No fastmath: it lets the compiler assume there are no NaNs, and NaN
+    # is how missing values are encoded. Compiled lazily on first use.
+    _penalty_kernel = njit(cache=True)(_penalty_loop)
+
+    def penalty_counts(profile: Tuple[float, ...], table: np.ndarray) -> np.ndarray:
+        """Failed checks per rule for one profile (numba kernel)."""
+        return _penalty_kernel(*profile, table)
+else:
+    penalty_counts = penalty_counts_np
@@ -1,12 +1,15 @@
 # agents/country_finder_agent.py
-import sys
-from pathlib import Path
-from typing import List, Dict, Any, Optional
+import heapq
+import re
+from bisect import bisect_right
+from dataclasses import dataclass
+from operator import attrgetter, itemgetter
+from types import MappingProxyType
+from typing import List, Dict, Any, Callable, Mapping, Optional, Tuple
 
-# Add project root so we can import tools, agents, ...
-PROJECT_ROOT = Path(__file__).resolve().parents[1]
-if str(PROJECT_ROOT) not in sys.path:
-    sys.path.insert(0, str(PROJECT_ROOT))
+import numpy as np
+
+# Project root is added to sys.path once, in agents/__init__.py
 
 # ============================================
 # Optional logger with global toggle
@@ -17,19 +20,177 @@ LOGGER_LOCAL_ENABLED = False
 LOGGING_ENABLED = LOGGER_DEFAULT_ENABLED and LOGGER_LOCAL_ENABLED
 
 
+def _noop_log(*args: Any, **kwargs: Any) -> None:
+    """Stand-in for logger methods when logging is disabled."""
+
+
+def _safe_log(method: Callable[..., Any]) -> Callable[..., None]:
+    """Wrap a logger method so a logging failure never breaks scoring."""
+    def call(*args: Any, **kwargs: Any) -> None:
+        try:
+            method(*args, **kwargs)
+        except Exception:
+            pass
+    return call
+
+
+# Numba (optional) – JIT for the weighted-score kernel
+try:
+    from numba import njit
+    _NUMBA_AVAILABLE = True
+except Exception:
+    njit = None
+    _NUMBA_AVAILABLE = False
+
+# Country-intrinsic factors, in the column order of the SoA factor table
+COUNTRY_FACTOR_ORDER = (
+    "visa_difficulty",
+    "quality_of_life",
+    "cost_of_living",
+    "job_market",
+)
+
+# Value used for factors of countries missing from COUNTRY_DATA
+DEFAULT_COUNTRY_FACTOR = 0.5
+
+# Missing-requirement messages that indicate a funds problem
+_FUNDS_RE = re.compile(r"funds|insufficient", re.IGNORECASE)
+
+# Financial score when there is a funds issue, by raw_score band:
+# < 0.4 → 0.3, < 0.6 → 0.5, < 0.8 → 0.7, otherwise 0.9
+_FUNDS_GAP_BANDS = (0.4, 0.6, 0.8)
+_FUNDS_GAP_SCORES = (0.3, 0.5, 0.7, 0.9)
+
+# One bit per supported language, so membership is a single AND
+_ENGLISH, _FRENCH, _GERMAN, _DUTCH, _SWEDISH = 1, 2, 4, 8, 16
+_LANG_BITS = {
+    "english": _ENGLISH,
+    "french": _FRENCH,
+    "german": _GERMAN,
+    "dutch": _DUTCH,
+    "swedish": _SWEDISH,
+}
+
+
+def _language_mask(languages: Any) -> int:
+    """Bit mask of the given language names (unknown names are ignored)."""
+    mask = 0
+    for lang in languages:
+        mask |= _LANG_BITS.get(lang, 0)
+    return mask
+
+
+# Contribution of a CEFR level to the language-alignment score
+CEFR_LEVEL_SCORES = {
+    "c1": 0.5,
+    "c2": 0.5,
+    "b1": 0.4,
+    "b2": 0.4,
+    "a1": 0.2,
+    "a2": 0.2,
+}
+
+
+def _ielts_contribution(ielts: float) -> float:
+    """Contribution of an IELTS band to the language-alignment score."""
+    if ielts >= 7.0:
+        return 0.5
+    if ielts >= 6.0:
+        return 0.4
+    if ielts >= 5.5:
+        return 0.3
+    if ielts > 0:
+        return 0.2
+    return 0.0
+
+
+def _weighted_scores(factors: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """Row-wise weighted sum of the factor matrix, scaled to 0-100."""
+    n_rows, n_factors = factors.shape
+    out = np.empty(n_rows)
+    for i in range(n_rows):
+        acc = 0.0
+        for j in range(n_factors):
+            acc += factors[i, j] * weights[j]
+        out[i] = acc * 100.0
+    return out
+
+
+if _NUMBA_AVAILABLE:
+    _score_kernel = njit(cache=True)(_weighted_scores)
+    # Warm up at import with a 1-row dummy so the first ranking does not pay
+    # the JIT (or on-disk cache load) cost
+    _score_kernel(np.zeros((1, 7)), np.zeros(7))
+else:
+    def _score_kernel(factors: np.ndarray, weights: np.ndarray) -> np.ndarray:
+        """
+        Pure-NumPy fallback when numba is not installed.
+
+        Accumulates column by column (not factors @ weights) so the sums
+        run in the same order as the kernel and round identically.
+        """
+        acc = np.zeros(factors.shape[0])
+        for j in range(factors.shape[1]):
+            acc += factors[:, j] * weights[j]
+        return acc * 100.0
+
+
+def _build_country_tables(
+    country_data: Mapping[str, Mapping[str, Any]],
+) -> Tuple[Dict[str, int], np.ndarray]:
+    """
+    Convert COUNTRY_DATA (dict-of-dicts) into Structure-of-Arrays form.
+
+    Returns:
+        (country -> row index, (n_countries + 1, 4) float array in
+        COUNTRY_FACTOR_ORDER). The extra last row holds the defaults used
+        for unknown countries, so lookups can always gather by index.
+    """
+    index = {name: i for i, name in enumerate(country_data)}
+    rows = [
+        [data.get(f, DEFAULT_COUNTRY_FACTOR) for f in COUNTRY_FACTOR_ORDER]
+        for data in country_data.values()
+    ]
+    rows.append([DEFAULT_COUNTRY_FACTOR] * len(COUNTRY_FACTOR_ORDER))
+    return index, np.array(rows, dtype=np.float64)
+
+
+@dataclass(slots=True)
+class ScoredCountry:
+    """Internal scored item passed between scoring and classification."""
+    country: str
+    score: float
+    pathway: Optional[str]
+    match_result: Dict[str, Any]
+    factors: Dict[str, float]   # FACTOR_ORDER name → 0-100 percentage
+
 
 class CountryFinderAgent:
     """
     Computes final scores (0-100) for countries based on weighted factors,
     ranks them, and groups into best/acceptable/not recommended categories.
     """
+
+    __slots__ = (
+        "match_results",
+        "user_profile",
+        "logger",
+        "_log_agent",
+        "_log_tool",
+        "_lang_scores",
+        "_fin_cache",
+        "_ranking_cache",
+    )
     
     # Score thresholds for classification
     BEST_THRESHOLD = 80.0
     ACCEPTABLE_THRESHOLD = 60.0
+
+    # Eligibility multiplier per MatchAgent status (unknown → High Risk)
+    _STATUS_MULT: Dict[str, float] = {"OK": 1.0, "Borderline": 0.8, "High Risk": 0.5}
     
-    # Scoring weights (must sum to 1.0)
-    WEIGHTS = {
+    # Scoring weights (must sum to 1.0; read-only)
+    WEIGHTS = MappingProxyType({
         "eligibility": 0.30,           # 30% - Can you qualify?
         "language_alignment": 0.15,    # 15% - Language match
         "financial_capacity": 0.20,    # 20% - Can you afford it?
@@ -37,7 +198,21 @@ class CountryFinderAgent:
         "quality_of_life": 0.10,       # 10% - Safety, healthcare, etc.
         "cost_of_living": 0.10,        # 10% - Living expenses
         "job_market": 0.05,            # 5% - Employment prospects
-    }
+    })
+
+    # Fixed column order of the factor matrix used by the vectorized scorer
+    FACTOR_ORDER = (
+        "eligibility",
+        "language_alignment",
+        "financial_capacity",
+        "visa_difficulty",
+        "quality_of_life",
+        "cost_of_living",
+        "job_market",
+    )
+    _WEIGHTS_TUPLE = itemgetter(*FACTOR_ORDER)(WEIGHTS)
+    # Weight vector aligned with FACTOR_ORDER (one product per ranking)
+    _WEIGHTS_VEC = np.array(_WEIGHTS_TUPLE, dtype=np.float64)
     
     # Country-specific data for scoring
     COUNTRY_DATA = {
@@ -98,6 +273,24 @@ class CountryFinderAgent:
             "languages": ["english"],
         },
     }
+    # Read-only: cached scores and the SoA tables below are derived from it
+    COUNTRY_DATA = MappingProxyType(
+        {name: MappingProxyType(data) for name, data in COUNTRY_DATA.items()}
+    )
+    COUNTRY_NAMES = tuple(COUNTRY_DATA)
+
+    # SoA view of COUNTRY_DATA: one contiguous row of factors per country
+    _COUNTRY_INDEX, _COUNTRY_FACTORS = _build_country_tables(COUNTRY_DATA)
+    _FACTOR_COL = {name: i for i, name in enumerate(COUNTRY_FACTOR_ORDER)}
+    _UNKNOWN_COUNTRY_ROW = len(_COUNTRY_INDEX)
+    # Same rows as plain tuples for scalar (single-country) lookups
+    _COUNTRY_ROWS: Dict[str, Tuple[float, ...]] = {
+        name: tuple(row) for name, row in zip(COUNTRY_DATA, _COUNTRY_FACTORS.tolist())
+    }
+    _DEFAULT_COUNTRY_ROW = (DEFAULT_COUNTRY_FACTOR,) * len(COUNTRY_FACTOR_ORDER)
+    _COUNTRY_LANG_MASK = {
+        name: _language_mask(data.get("languages", ())) for name, data in COUNTRY_DATA.items()
+    }
     
     def __init__(
         self,
@@ -121,6 +314,11 @@ class CountryFinderAgent:
         self.match_results = match_results
         self.user_profile = user_profile
 
+        self._prepare_language_scores()
+        self._fin_cache: Dict[int, Tuple[Dict[str, Any], float]] = {}
+        # Cached rank_countries() results, keyed by include_reasons
+        self._ranking_cache: Dict[bool, Dict[str, Any]] = {}
+
         # Same logger pattern as MatchAgent
         if logger is not None:
             self.logger = logger
@@ -129,305 +327,353 @@ class CountryFinderAgent:
         else:
             self.logger = None
 
-        # High-level init log
+        # Bind the log calls once: no per-call logger checks or try/except
         if self.logger:
-            try:
-                summary = {
-                    "matches_count": len(self.match_results),
-                    "goal": self.user_profile.get("goal"),
-                    "citizenship": self.user_profile.get("citizenship"),
-                }
-                self.logger.log_agent_call(
-                    agent_name="CountryFinderAgent.__init__",
-                    session_id=None,
-                    input_summary=str(summary),
-                )
-            except Exception:
-                pass
+            self._log_agent = _safe_log(self.logger.log_agent_call)
+            self._log_tool = _safe_log(self.logger.log_tool_call)
+        else:
+            self._log_agent = self._log_tool = _noop_log
+
+        # High-level init log (formatted only if the logger emits it)
+        self._log_agent(
+            "CountryFinderAgent.__init__",
+            None,
+            "matches_count=%d, goal=%s, citizenship=%s",
+            len(self.match_results),
+            self.user_profile.get("goal"),
+            self.user_profile.get("citizenship"),
+        )
     
+    def _prepare_language_scores(self) -> None:
+        """
+        Precompute the language-alignment score of every known country.
+
+        The user profile is fixed for the agent's lifetime, so each language
+        is scored once and every country's alignment becomes a dict lookup.
+        """
+        german = (self.user_profile.get("german_level") or "none").lower()
+        french = (self.user_profile.get("french_level") or "none").lower()
+        band_en = _ielts_contribution(self.user_profile.get("ielts", 0))
+        band_de = CEFR_LEVEL_SCORES.get(german, 0.0)
+        band_fr = CEFR_LEVEL_SCORES.get(french, 0.0)
+
+        self._lang_scores: Dict[str, float] = {}
+        for country, mask in self._COUNTRY_LANG_MASK.items():
+            score = 0.0
+            if mask & _ENGLISH:
+                score += band_en
+            if mask & _GERMAN:
+                score += band_de
+            if mask & _FRENCH:
+                score += band_fr
+            self._lang_scores[country] = min(score, 1.0)
+
+    def invalidate(self) -> None:
+        """
+        Drop cached scores so the next call recomputes them.
+
+        Only needed if match_results or user_profile are mutated in place
+        after construction.
+        """
+        self._prepare_language_scores()
+        self._fin_cache.clear()
+        self._ranking_cache.clear()
+
     def _score_eligibility(self, match_result: Dict[str, Any]) -> float:
         """Score eligibility based on MatchAgent result."""
-        status = match_result.get("status", "High Risk")
-        raw_score = match_result.get("raw_score", 0.0)
-        
-        if status == "OK":
-            return raw_score
-        elif status == "Borderline":
-            return raw_score * 0.8
-        else:
-            return raw_score * 0.5
+        return match_result.get("raw_score", 0.0) * self._STATUS_MULT.get(
+            match_result.get("status", "High Risk"), 0.5
+        )
     
     def _score_language_alignment(self, country: str) -> float:
         """Score language alignment based on user's language skills."""
-        country_data = self.COUNTRY_DATA.get(country, {})
-        supported_languages = country_data.get("languages", [])
-        
-        score = 0.0
-        
-        # English
-        if "english" in supported_languages:
-            ielts = self.user_profile.get("ielts", 0)
-            if ielts >= 7.0:
-                score += 0.5
-            elif ielts >= 6.0:
-                score += 0.4
-            elif ielts >= 5.5:
-                score += 0.3
-            elif ielts > 0:
-                score += 0.2
-        
-        # German
-        if "german" in supported_languages:
-            german = (self.user_profile.get("german_level") or "none").lower()
-            if german in ["c1", "c2"]:
-                score += 0.5
-            elif german in ["b1", "b2"]:
-                score += 0.4
-            elif german in ["a1", "a2"]:
-                score += 0.2
-        
-        # French
-        if "french" in supported_languages:
-            french = (self.user_profile.get("french_level") or "none").lower()
-            if french in ["c1", "c2"]:
-                score += 0.5
-            elif french in ["b1", "b2"]:
-                score += 0.4
-            elif french in ["a1", "a2"]:
-                score += 0.2
-        
-        return min(score, 1.0)
+        return self._lang_scores.get(country, 0.0)
     
     def _score_financial_capacity(self, match_result: Dict[str, Any]) -> float:
         """Score financial capacity based on funds vs requirements."""
+        # Keyed by id(); the result object is stored alongside so the id
+        # cannot be reused by another dict while the entry is alive
+        cached = self._fin_cache.get(id(match_result))
+        if cached is not None and cached[0] is match_result:
+            return cached[1]
+
+        score = self._compute_financial_capacity(match_result)
+        self._fin_cache[id(match_result)] = (match_result, score)
+        return score
+
+    def _compute_financial_capacity(self, match_result: Dict[str, Any]) -> float:
+        """Uncached body of _score_financial_capacity."""
         gaps = match_result.get("rule_gaps", {})
         missing = gaps.get("missing_requirements", [])
         
-        has_funds_issue = any(
-            "funds" in req.lower() or "insufficient" in req.lower()
-            for req in missing
-        )
+        has_funds_issue = any(_FUNDS_RE.search(req) for req in missing)
         
         if not has_funds_issue:
             return 1.0
         
         raw_score = match_result.get("raw_score", 0.5)
-        
-        if raw_score >= 0.8:
-            return 0.9
-        elif raw_score >= 0.6:
-            return 0.7
-        elif raw_score >= 0.4:
-            return 0.5
-        else:
-            return 0.3
+        return _FUNDS_GAP_SCORES[bisect_right(_FUNDS_GAP_BANDS, raw_score)]
     
+    def _get_country_factors(self, country: str) -> Tuple[float, ...]:
+        """Get the tuple of country-intrinsic factors (COUNTRY_FACTOR_ORDER)."""
+        return self._COUNTRY_ROWS.get(country, self._DEFAULT_COUNTRY_ROW)
+
     def _get_country_factor(self, country: str, factor: str) -> float:
         """Get a specific factor score for a country."""
-        country_data = self.COUNTRY_DATA.get(country, {})
-        return country_data.get(factor, 0.5)
+        col = self._FACTOR_COL.get(factor)
+        if col is None:
+            return DEFAULT_COUNTRY_FACTOR
+        return self._get_country_factors(country)[col]
     
-    def _calculate_final_score(self, match_result: Dict[str, Any]) -> float:
-        """Calculate final weighted score (0-100) for a country."""
+    def _factor_row(self, match_result: Dict[str, Any]) -> List[float]:
+        """Build one factor-matrix row (FACTOR_ORDER) for a match result."""
         country = match_result.get("country", "")
-        
-        factors = {
-            "eligibility": self._score_eligibility(match_result),
-            "language_alignment": self._score_language_alignment(country),
-            "financial_capacity": self._score_financial_capacity(match_result),
-            "visa_difficulty": self._get_country_factor(country, "visa_difficulty"),
-            "quality_of_life": self._get_country_factor(country, "quality_of_life"),
-            "cost_of_living": self._get_country_factor(country, "cost_of_living"),
-            "job_market": self._get_country_factor(country, "job_market"),
-        }
-        
-        weighted_score = sum(
-            self.WEIGHTS[factor] * score 
-            for factor, score in factors.items()
+        return [
+            self._score_eligibility(match_result),
+            self._score_language_alignment(country),
+            self._score_financial_capacity(match_result),
+            *self._get_country_factors(country),
+        ]
+
+    def _build_factor_matrix(self) -> Tuple[List[Dict[str, Any]], np.ndarray]:
+        """
+        Build the (n_countries, 7) factor matrix column by column.
+
+        The three per-result factors are filled from list comprehensions;
+        the four country-intrinsic columns are one gather from the SoA table.
+
+        Returns:
+            (scored match_results, factor matrix) — results without a
+            country are skipped, so row i belongs to the i-th returned result.
+        """
+        rows: List[Dict[str, Any]] = [
+            mr for mr in self.match_results if mr.get("country")
+        ]
+        countries = [mr["country"] for mr in rows]
+        unknown = self._UNKNOWN_COUNTRY_ROW
+        idx = np.fromiter(
+            (self._COUNTRY_INDEX.get(c, unknown) for c in countries),
+            dtype=np.intp,
+            count=len(countries),
         )
-        
-        final_score = weighted_score * 100
-        return round(final_score, 2)
+
+        factor_matrix = np.empty((len(rows), len(self.FACTOR_ORDER)), dtype=np.float64)
+        factor_matrix[:, 0] = [self._score_eligibility(mr) for mr in rows]
+        factor_matrix[:, 1] = [self._lang_scores.get(c, 0.0) for c in countries]
+        factor_matrix[:, 2] = [self._score_financial_capacity(mr) for mr in rows]
+        factor_matrix[:, 3:] = self._COUNTRY_FACTORS[idx]
+        return rows, factor_matrix
+
+    def _score_matrix(self, factor_matrix: np.ndarray) -> List[float]:
+        """
+        Weighted scores (0-100, 2 decimals) for every row of the factor matrix.
+
+        Rounded with Python's round() rather than np.round(): np.round
+        scales by 100 first, so a float such as 56.725 (stored just above
+        the half) comes out as 56.72 instead of 56.73.
+        """
+        scores = _score_kernel(factor_matrix, self._WEIGHTS_VEC)
+        return [round(score, 2) for score in scores.tolist()]
+
+    def _calculate_final_score(self, match_result: Dict[str, Any]) -> float:
+        """Calculate final weighted score (0-100) for a country."""
+        factor_matrix = np.array([self._factor_row(match_result)], dtype=np.float64)
+        return self._score_matrix(factor_matrix)[0]
     
-    def _classify_countries(self, scored_countries: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def _classify_countries(
+        self,
+        scored_countries: List[ScoredCountry],
+        include_reasons: bool = True,
+    ) -> Dict[str, Any]:
         """
-        Classify countries into best/acceptable/not recommended.
+        Classify countries into best/acceptable/not recommended and build
+        the matching detailed_breakdown rows in the same pass.
+
+        With include_reasons=False the best/acceptable entries carry only
+        country, score and pathway (no reason string is built).
         """
         best_options = []
         acceptable = []
         not_recommended = []
+        detailed_breakdown = []
         
         for item in scored_countries:
-            country = item["country"]
-            score = item["score"]
-            pathway = item.get("pathway")  # ⬅️ pathway را حفظ می‌کنیم
+            country = item.country
+            score = item.score
+            pathway = item.pathway  # ⬅️ pathway را حفظ می‌کنیم
+            match_result = item.match_result
+            factors = item.factors
+
+            detailed_breakdown.append({
+                "country": country,
+                "pathway": pathway,
+                "final_score": score,
+                "eligibility_status": match_result.get("status"),
+                "eligibility_raw_score": match_result.get("raw_score"),
+                "language_score": factors["language_alignment"],
+                "financial_score": factors["financial_capacity"],
+                "visa_difficulty": factors["visa_difficulty"],
+                "quality_of_life": factors["quality_of_life"],
+                "cost_of_living": factors["cost_of_living"],
+                "job_market": factors["job_market"],
+            })
             
             if score >= self.BEST_THRESHOLD:
-                best_options.append({
-                    "country": country,
-                    "score": score,
-                    "pathway": pathway,
-                    "reason": self._generate_reason(item, "best"),
-                })
+                category, bucket = "best", best_options
             elif score >= self.ACCEPTABLE_THRESHOLD:
-                acceptable.append({
-                    "country": country,
-                    "score": score,
-                    "pathway": pathway,
-                    "reason": self._generate_reason(item, "acceptable"),
-                })
+                category, bucket = "acceptable", acceptable
             else:
                 # برای سازگاری، هم‌چنان فقط نام کشور را برمی‌گردانیم
                 not_recommended.append(country)
+                continue
+
+            entry = {"country": country, "score": score, "pathway": pathway}
+            if include_reasons:
+                entry["reason"] = self._generate_reason(
+                    match_result.get("status", "Unknown"),
+                    match_result.get("rule_gaps", {}).get("missing_requirements", []),
+                    category,
+                )
+            bucket.append(entry)
         
         return {
             "best_options": best_options,
             "acceptable": acceptable,
             "not_recommended": not_recommended,
+            "detailed_breakdown": detailed_breakdown,
         }
     
-    def _generate_reason(self, scored_item: Dict[str, Any], category: str) -> str:
+    def _generate_reason(self, status: str, gaps: List[str], category: str) -> str:
         """Generate a brief reason for the score/category."""
-        country = scored_item["country"]
-        score = scored_item["score"]
-        match_result = scored_item.get("match_result", {})
-        status = match_result.get("status", "Unknown")
-        
         if category == "best":
             return (
                 f"Strong match with eligibility status '{status}', "
                 f"good language alignment, and favorable conditions."
             )
-        else:
-            gaps = match_result.get("rule_gaps", {}).get("missing_requirements", [])
-            if gaps:
-                return (
-                    f"Acceptable match but has minor gaps: {', '.join(gaps[:2])}. "
-                    f"Consider addressing these to improve chances."
-                )
-            else:
-                return f"Acceptable match with status '{status}'."
+        if gaps:
+            return (
+                f"Acceptable match but has minor gaps: {', '.join(gaps[:2])}. "
+                f"Consider addressing these to improve chances."
+            )
+        return f"Acceptable match with status '{status}'."
     
-    def rank_countries(self) -> Dict[str, Any]:
+    def _compute_scores(self) -> List[Tuple[str, float, Dict[str, Any]]]:
+        """
+        Score every match result as (country, score, match_result) tuples.
+
+        Lighter than _score_all(): no per-item dicts and no breakdown matrix.
+        """
+        rows, factor_matrix = self._build_factor_matrix()
+        scores = self._score_matrix(factor_matrix)
+        return [
+            (match_result["country"], final_score, match_result)
+            for match_result, final_score in zip(rows, scores)
+        ]
+
+    def _score_all(self) -> List[ScoredCountry]:
+        """
+        Score every match result (unsorted, in match_results order).
+
+        Scores come from one matrix-vector product; the same factor matrix
+        (as 0-100 percentages) is kept on each item for detailed_breakdown.
+        """
+        rows, factor_matrix = self._build_factor_matrix()
+        scores = self._score_matrix(factor_matrix)
+        factor_pcts = [
+            [round(value, 2) for value in row]
+            for row in (factor_matrix * 100.0).tolist()
+        ]
+
+        return [
+            ScoredCountry(
+                country=match_result["country"],
+                score=final_score,
+                pathway=match_result.get("pathway"),  # ⬅️ pathway را از MatchAgent می‌گیریم
+                match_result=match_result,
+                factors=dict(zip(self.FACTOR_ORDER, pcts)),
+            )
+            for match_result, final_score, pcts in zip(rows, scores, factor_pcts)
+        ]
+
+    def rank_countries(self, include_reasons: bool = True) -> Dict[str, Any]:
         """
         Main method: Compute scores, rank countries, and classify them.
+
+        Args:
+            include_reasons: Build the human-readable "reason" for
+                best/acceptable entries (skip it if the caller ignores them)
+
+        The result is cached on the instance; call invalidate() after
+        mutating the inputs.
         """
-        if self.logger:
-            try:
-                self.logger.log_agent_call(
-                    agent_name="CountryFinderAgent.rank_countries",
-                    session_id=None,
-                    input_summary=f"match_results={len(self.match_results)}",
-                )
-            except Exception:
-                pass
+        cached = self._ranking_cache.get(include_reasons)
+        if cached is not None:
+            return cached
 
-        scored_countries: List[Dict[str, Any]] = []
-        scores_dict: Dict[str, float] = {}
-        
-        # Calculate score for each match result
-        for match_result in self.match_results:
-            country = match_result.get("country")
-            if not country:
-                continue
-            
-            final_score = self._calculate_final_score(match_result)
-            pathway = match_result.get("pathway")  # ⬅️ pathway را از MatchAgent می‌گیریم
-            
-            scored_countries.append({
-                "country": country,
-                "score": final_score,
-                "match_result": match_result,
-                "pathway": pathway,
-            })
-            
-            scores_dict[country] = final_score
+        self._log_agent(
+            "CountryFinderAgent.rank_countries",
+            None,
+            "match_results=%d",
+            len(self.match_results),
+        )
+
+        scored_countries = self._score_all()
+        scores_dict: Dict[str, float] = {
+            item.country: item.score for item in scored_countries
+        }
         
         # Sort by score (descending)
-        scored_countries.sort(key=lambda x: x["score"], reverse=True)
+        scored_countries.sort(key=attrgetter("score"), reverse=True)
         
-        # Classify into categories
-        classification = self._classify_countries(scored_countries)
-        
-        # Build detailed breakdown for transparency
-        detailed_breakdown = []
-        for item in scored_countries:
-            country = item["country"]
-            match_result = item["match_result"]
-            pathway = item.get("pathway")
-            
-            detailed_breakdown.append({
-                "country": country,
-                "pathway": pathway,
-                "final_score": item["score"],
-                "eligibility_status": match_result.get("status"),
-                "eligibility_raw_score": match_result.get("raw_score"),
-                "language_score": round(self._score_language_alignment(country) * 100, 2),
-                "financial_score": round(self._score_financial_capacity(match_result) * 100, 2),
-                "visa_difficulty": round(self._get_country_factor(country, "visa_difficulty") * 100, 2),
-                "quality_of_life": round(self._get_country_factor(country, "quality_of_life") * 100, 2),
-                "cost_of_living": round(self._get_country_factor(country, "cost_of_living") * 100, 2),
-                "job_market": round(self._get_country_factor(country, "job_market") * 100, 2),
-            })
+        # Classify into categories and build the detailed breakdown for
+        # transparency, in one pass over the sorted items
+        classification = self._classify_countries(scored_countries, include_reasons)
 
-        if self.logger:
-            try:
-                self.logger.log_tool_call(
-                    "CountryFinderAgent.rank_countries.result",
-                    {
-                        "best_count": len(classification["best_options"]),
-                        "acceptable_count": len(classification["acceptable"]),
-                        "not_recommended_count": len(classification["not_recommended"]),
-                    },
-                )
-            except Exception:
-                pass
+        self._log_tool(
+            "CountryFinderAgent.rank_countries.result",
+            {
+                "best_count": len(classification["best_options"]),
+                "acceptable_count": len(classification["acceptable"]),
+                "not_recommended_count": len(classification["not_recommended"]),
+            },
+        )
         
-        return {
+        ranking = {
             "best_options": classification["best_options"],
             "acceptable": classification["acceptable"],
             "not_recommended": classification["not_recommended"],
             "scores": scores_dict,
-            "detailed_breakdown": detailed_breakdown,
+            "detailed_breakdown": classification["detailed_breakdown"],
         }
+        self._ranking_cache[include_reasons] = ranking
+        return ranking
     
     def get_top_recommendation(self) -> Optional[str]:
-        """Get the single best recommended country."""
-        ranking = self.rank_countries()
-        
-        best = ranking.get("best_options", [])
-        if best:
-            top_country = best[0]["country"]
-            if self.logger:
-                try:
-                    self.logger.log_tool_call(
-                        "CountryFinderAgent.get_top_recommendation",
-                        {"top_country": top_country, "source": "best_options"},
-                    )
-                except Exception:
-                    pass
-            return top_country
-        
-        acceptable = ranking.get("acceptable", [])
-        if acceptable:
-            top_country = acceptable[0]["country"]
-            if self.logger:
-                try:
-                    self.logger.log_tool_call(
-                        "CountryFinderAgent.get_top_recommendation",
-                        {"top_country": top_country, "source": "acceptable"},
-                    )
-                except Exception:
-                    pass
-            return top_country
+        """
+        Get the single best recommended country.
+
+        Reuses the cached ranking if rank_countries() already ran; otherwise
+        takes an O(N) partial selection over the raw scores instead of
+        building the full ranking (sort + classification + breakdown).
+        """
+        ranking = next(iter(self._ranking_cache.values()), None)
+        if ranking is not None:
+            ranked = ranking["best_options"] or ranking["acceptable"]
+            top = (ranked[0]["country"], ranked[0]["score"]) if ranked else None
+        else:
+            largest = heapq.nlargest(1, self._compute_scores(), key=itemgetter(1))
+            top = largest[0][:2] if largest else None
+
+        if top is not None and top[1] >= self.BEST_THRESHOLD:
+            top_country, source = top[0], "best_options"
+        elif top is not None and top[1] >= self.ACCEPTABLE_THRESHOLD:
+            top_country, source = top[0], "acceptable"
+        else:
+            top_country, source = None, "none"
         
-        if self.logger:
-            try:
-                self.logger.log_tool_call(
-                    "CountryFinderAgent.get_top_recommendation",
-                    {"top_country": None, "source": "none"},
-                )
-            except Exception:
-                pass
+        self._log_tool(
+            "CountryFinderAgent.get_top_recommendation",
+            {"top_country": top_country, "source": source},
+        )
         
-        return None
+        return top_country
@@ -1,7 +1,13 @@
 # agents/explain_agent.py
 
+import asyncio
+import hashlib
 import json
-from typing import Optional
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple
 import sys
 from pathlib import Path
 import os
@@ -16,10 +22,16 @@ if str(PROJECT_ROOT) not in sys.path:
 # ----------------------------------------------------
 # Imports
 # ----------------------------------------------------
+from pydantic import BaseModel
+
 from memory.session_service import SessionService
-from tools.search_tool import SearchTool
 from schemas.user_profile import UserProfile
-from schemas.country_ranking import CountryRanking
+from schemas.country_ranking import CountryRanking, RankedCountry
+from tools.genai_client import GEMINI_REQUEST_OPTIONS, configure_genai
+
+if TYPE_CHECKING:
+    # SearchTool pulls in google.generativeai at import time
+    from tools.search_tool import SearchTool
 
 # Logger
 from tools.logger import Logger, LOGGING_ENABLED as LOGGER_DEFAULT_ENABLED
@@ -28,11 +40,306 @@ from tools.logger import Logger, LOGGING_ENABLED as LOGGER_DEFAULT_ENABLED
 LOGGER_LOCAL_ENABLED = False
 LOGGING_ENABLED = LOGGER_DEFAULT_ENABLED and LOGGER_LOCAL_ENABLED
 
-# Gemini (optional)
+# Gemini (optional) – imported lazily in ExplainAgent.__init__, only when
+# GEMINI_API_KEY is set, so offline mode never loads gRPC/protobuf.
+def _load_genai():
+    try:
+        import google.generativeai as genai
+    except Exception:
+        genai = None
+    return genai
+
+# Fast JSON (optional)
+try:
+    import orjson
+except Exception:
+    orjson = None
+
+
+def _dumps(data: Any) -> str:
+    """Compact JSON text (orjson when available)."""
+    if orjson is not None:
+        return orjson.dumps(data).decode("utf-8")
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+
+# Disk cache for Gemini responses (optional)
 try:
-    import google.generativeai as genai
+    import diskcache
 except Exception:
-    genai = None
+    diskcache = None
+
+# Gemini response cache: in-memory LRU in front of an on-disk store
+GEMINI_CACHE_DIR = PROJECT_ROOT / ".explain_cache"
+GEMINI_CACHE_TTL = 7 * 24 * 60 * 60   # seconds
+GEMINI_CACHE_DISABLED = os.getenv("GEMINI_CACHE_DISABLED") == "1"
+GEMINI_MEMORY_CACHE_SIZE = 256
+
+# Max wait for web search before prompting Gemini without it (async path)
+SEARCH_TIMEOUT_SECONDS = 3.0
+
+# SearchTool results shared across agents:
+# (live, query, country, pathway, max_results) → (expires_at, results), LRU-bounded
+SEARCH_CACHE_TTL = 24 * 60 * 60   # seconds
+SEARCH_FAILURE_TTL = 60           # failed searches are retried after this
+SEARCH_CACHE_SIZE = 512
+_SEARCH_CACHE: "OrderedDict[Tuple[bool, str, str, str, int], Tuple[float, List[Dict[str, Any]]]]" = OrderedDict()
+_SEARCH_CACHE_LOCK = threading.Lock()
+# Searches currently running, so an identical request (e.g. a prewarm still
+# in flight) waits for that result instead of paying for a second call
+_SEARCH_IN_FLIGHT: Dict[Tuple[bool, str, str, str, int], Future] = {}
+
+# Prompt web context covers the top-K countries, searched in parallel
+SEARCH_TOP_K = 3
+SEARCH_SNIPPET_CHARS = 300   # per-result cap on prompt growth
+PREWARM_WAIT_SECONDS = 2.0   # max wait on an identical in-flight search before searching again
+_SEARCH_POOL = ThreadPoolExecutor(max_workers=SEARCH_TOP_K, thread_name_prefix="explain-search")
+
+# Background Gemini generations started by generate_explanation_cached
+_REFRESH_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix="explain-refresh")
+
+# Batched Gemini requests (generate_explanations_batch)
+BATCH_MAX_SIZE = 8
+BATCH_MAX_PARALLEL = 4   # batched requests in flight at once
+BATCH_SEPARATOR = "<<<===>>>"
+
+# Single explanations in flight at once (agenerate_explanations)
+ASYNC_MAX_CONCURRENCY = 8
+
+# Serialized profiles/rankings kept per agent (see ExplainAgent._model_json)
+JSON_CACHE_SIZE = 64
+
+# What the Gemini prompt gets to see of the profile / ranking. Besides the
+# scoring fields: german/french levels, because the ranking's language
+# alignment scores them (e.g. German for Germany); cefr_level, the only
+# English level when no IELTS score was given (ielts_score defaults to 0);
+# immigration_goal, because the recommendation is framed by it.
+_PROMPT_PROFILE_FIELDS = {
+    "personal_info": {"first_name", "age", "nationality"},
+    "education": {"degree_level", "field_of_study"},
+    "work_experience": {"occupation", "years_of_experience"},
+    "language_proficiency": {"ielts_score", "cefr_level", "german_level", "french_level"},
+    "financial_info": {"liquid_assets_usd"},
+    "immigration_goal": True,
+}
+PROMPT_MAX_RANKED = 3
+
+# Routing (see ExplainAgent._route); scores are on the 0-100 ranking scale
+GEMINI_FLASH_MODEL = "gemini-1.5-flash"
+ROUTE_OFFLINE_SCORE = 90.0
+ROUTE_FLASH_LEAD = 15.0
+
+# Fixed part of the Gemini prompt (role + task + format rules)
+STATIC_ADVISOR_PROMPT = """You are an expert immigration advisor. Provide a clear, friendly recommendation.
+
+TASK:
+1. Explain why the TOP MATCH country is the best match.
+2. Summarize the user's key qualifications.
+3. List 2-3 strengths.
+4. List 1-2 areas for improvement.
+5. Suggest next steps.
+6. If available, incorporate the latest visa information from web search.
+
+Keep it concise, professional, and encouraging.
+Format in Markdown.
+"""
+
+# Per-user part of the prompt (also one block per user in batched prompts)
+_USER_BLOCK_TMPL = (
+    "TOP MATCH: {top_country}\n\n"
+    "USER PROFILE:\n{profile_json}\n\n"
+    "COUNTRY RANKING:\n{ranking_json}\n"
+    "{search_context}\n"
+)
+
+
+# Offline fallback layout
+DIVIDER = "═══════════════════════════════════════"
+_FALLBACK_HEADER_TMPL = (
+    "🌍 **Immigration Recommendation for {first_name}**\n\n"
+    f"{DIVIDER}\n\n"
+    # Top recommendation
+    "🥇 **Top Choice: {country}**\n"
+    "   Pathway: {pathway}\n"
+    "   Match Score: {score}\n"
+    "{search_info}"
+    "\n"
+    # Profile summary
+    "📋 **Your Profile:**\n"
+    "   • Age: {age} years\n"
+    "   • Nationality: {nationality}\n"
+    "   • Education: {degree} in {field}\n"
+    "   • Experience: {years} years as {occupation}\n"
+    "   • English: IELTS {ielts}\n"
+    "   • Funds: ${funds:,.2f} USD\n\n"
+)
+FALLBACK_FOOTER = (
+    "🎯 **Next Steps:**\n"
+    "   1. Research visa requirements for your top choice.\n"
+    "   2. Prepare necessary documents (diplomas, work letters).\n"
+    "   3. Take/improve IELTS if needed.\n"
+    "   4. Consider consulting with a licensed immigration consultant.\n\n"
+    f"{DIVIDER}\n"
+    "💬 Good luck with your immigration journey!\n"
+)
+
+
+# Fallback strengths / improvements: (predicate(user_profile), line) in
+# display order. Strength lines are formatted with degree/years/funds/ielts.
+_STRONG_DEGREES = frozenset({"bachelor", "master", "phd"})
+
+_STRENGTH_RULES = (
+    (lambda u: u.education.degree_level in _STRONG_DEGREES,
+     "   • Strong educational background ({degree})"),
+    (lambda u: u.work_experience.years_of_experience >= 2,
+     "   • Valuable work experience ({years} years)"),
+    (lambda u: u.financial_info.liquid_assets_usd >= 10000,
+     "   • Solid financial foundation (${funds:,.0f})"),
+    (lambda u: bool(u.language_proficiency.ielts_score)
+     and u.language_proficiency.ielts_score >= 6.5,
+     "   • Good English proficiency (IELTS {ielts})"),
+)
+
+_IMPROVEMENT_RULES = (
+    (lambda u: not u.language_proficiency.ielts_score
+     or u.language_proficiency.ielts_score < 6.5,
+     "   • Take IELTS test to improve your language score"),
+    (lambda u: u.financial_info.liquid_assets_usd < 15000,
+     "   • Build more savings for settlement funds"),
+    (lambda u: u.work_experience.years_of_experience < 3,
+     "   • Gain more work experience in your field"),
+)
+
+# No-recommendation explanations
+# goal → (minimum realistic funds in USD, label); تقریبی بر اساس rules فعلی
+_DEFAULT_GOAL_LIMIT = (4000.0, "Work")
+_GOAL_LIMITS = {
+    "study": (11000.0, "Study"),
+    "pr": (8000.0, "Permanent Residence (PR)"),
+    "work": _DEFAULT_GOAL_LIMIT,
+}
+
+_INSUFFICIENT_FUNDS_TMPL = (
+    "❌ **No recommended countries found for your profile.**\n\n"
+    "### Main Reason: Insufficient Funds for Your Goal\n"
+    "- Your available funds: **${funds:,.0f} USD**\n"
+    "- Minimum realistic funds for **{goal_label}** pathways: "
+    "**around ${hard_limit:,.0f} USD or more** (for a single applicant)\n\n"
+    "Most study/work/PR visas require you to prove you can pay your living "
+    "costs for at least one year (and sometimes tuition as well). With your "
+    "current savings, your application would be **very high risk** in almost "
+    "all target countries.\n\n"
+    "### What You Can Do:\n"
+    "1. Increase your savings (ideally above this minimum level).\n"
+    "2. Consider cheaper destinations or work-based routes instead of study.\n"
+    "3. Look for scholarships or fully-funded programs to reduce required funds.\n\n"
+    "💡 When your funds increase, re-run the Immigration Pathfinder for new recommendations."
+)
+
+_NO_MATCH_TMPL = (
+    "❌ **No recommended countries found for your profile.**\n\n"
+    "This usually happens when:\n"
+    "- Your current profile (age, degree, English, funds) does not reach the minimum thresholds, or\n"
+    "- All options are classified as **high risk** for visa approval.\n\n"
+    "### Quick Summary of Your Profile:\n"
+    "- Age: **{age}**\n"
+    "- Education: **{degree} in {field}**\n"
+    "- Work Experience: **{years} years**\n"
+    "- IELTS: **{ielts}**\n"
+    "- Available Funds: **${funds:,.0f} USD**\n\n"
+    "### Suggestions:\n"
+    "- Improve your English score (IELTS 6.0–6.5+ for most Study/Work paths).\n"
+    "- Increase your savings if possible.\n"
+    "- Consider adjusting your goal (e.g., Work instead of Study) or your target countries.\n"
+)
+
+
+def _response_text(result: Any) -> str:
+    """Extract text from a Gemini response or stream chunk ("" if none)."""
+    try:
+        return result.text or ""
+    except Exception:
+        pass
+    try:
+        parts = result.candidates[0].content.parts
+        return "".join(p.text for p in parts if hasattr(p, "text"))
+    except Exception:
+        return ""
+
+
+def _format_gemini_prompt(
+    top_country: str,
+    profile_json: str,
+    ranking_json: str,
+    search_context: str,
+) -> str:
+    # Static instructions first, per-user data last: the prefix is
+    # byte-identical across calls, so Gemini can reuse it server-side.
+    return STATIC_ADVISOR_PROMPT + "\n" + _USER_BLOCK_TMPL.format(
+        top_country=top_country,
+        profile_json=profile_json,
+        ranking_json=ranking_json,
+        search_context=search_context,
+    )
+
+
+def _format_search_context(
+    countries: List[RankedCountry],
+    all_results: Iterable[List[Dict[str, Any]]],
+) -> str:
+    """Web search results per country → prompt block ("" if nothing found)."""
+    lines: List[str] = []
+    for country, search_results in zip(countries, all_results):
+        if not search_results:
+            continue
+        lines.append(f"[{country.country}]")
+        lines.extend(
+            f"{i}. {result.get('title', '')}\n"
+            f"   {result.get('snippet', '')[:SEARCH_SNIPPET_CHARS]}"
+            for i, result in enumerate(search_results, 1)
+        )
+
+    if not lines:
+        return ""
+    return "\n\nLATEST INFORMATION FROM WEB:\n" + "\n".join(lines) + "\n"
+
+
+def _bucket(value: float, step: float) -> float:
+    """Round value to the nearest multiple of step."""
+    return round(float(value or 0.0) / step) * step
+
+
+def _prompt_cache_key(user_profile: UserProfile, ranking: CountryRanking) -> str:
+    """
+    Stable cache key for a (profile, ranking) pair.
+
+    Built from the same fields the prompt sends (_PROMPT_PROFILE_FIELDS and
+    the top PROMPT_MAX_RANKED countries) by plain attribute access – no
+    model_dump. Funds are bucketed to the nearest $500 and IELTS to the
+    nearest 0.5, so near-duplicate profiles map to the same Gemini response.
+    """
+    personal = user_profile.personal_info
+    edu = user_profile.education
+    work = user_profile.work_experience
+    lang = user_profile.language_proficiency
+
+    profile = (
+        personal.first_name, personal.age, personal.nationality,
+        edu.degree_level, edu.field_of_study,
+        work.occupation, work.years_of_experience,
+        _bucket(lang.ielts_score, 0.5), lang.cefr_level,
+        lang.german_level, lang.french_level,
+        _bucket(user_profile.financial_info.liquid_assets_usd, 500.0),
+        user_profile.immigration_goal,
+    )
+    countries = tuple(
+        (c.country, c.pathway, c.score, c.reason)
+        for c in ranking.ranked_countries[:PROMPT_MAX_RANKED]
+    )
+
+    profile_hash = hashlib.sha256(repr(profile).encode("utf-8")).hexdigest()
+    ranking_hash = hashlib.sha256(repr(countries).encode("utf-8")).hexdigest()
+    return f"{profile_hash}:{ranking_hash}:{ranking.ranked_countries[0].country}"
 
 
 class ExplainAgent:
@@ -48,7 +355,7 @@ class ExplainAgent:
     def __init__(
         self,
         session_service: Optional[SessionService],
-        search_tool: Optional[SearchTool],
+        search_tool: Optional["SearchTool"],
         logger: Optional["Logger"] = None,
     ):
         self.session_service = session_service
@@ -65,33 +372,122 @@ class ExplainAgent:
         # Gemini setup
         self.gemini_enabled = False
         self.gemini_model = None
+        self.gemini_flash_model = None   # cheaper tier, see _route
+
+        # Gemini response cache (see _cached_response / _store_response)
+        self._response_cache: "OrderedDict[str, str]" = OrderedDict()
+        self._response_cache_lock = threading.Lock()   # batch / refresh threads share it
+        self._disk_cache = None
+
+        # id(model) -> (model, compact JSON) for prompt building; the entry
+        # keeps the model alive, so its id can't be reused while cached
+        self._json_cache: "OrderedDict[int, Tuple[BaseModel, str]]" = OrderedDict()
+        self._json_cache_lock = threading.Lock()
+
+        # Cache keys with a background generation in flight
+        self._refreshing: set = set()
+        self._refresh_lock = threading.Lock()
+
+        # Set once the background warmup call has finished (or was skipped)
+        self._warmed = threading.Event()
+
+        # google.generativeai is imported/configured on first use (see
+        # _ensure_gemini); with a key set, the warmup thread does it early.
+        self._api_key = os.getenv("GEMINI_API_KEY")
+        self._genai = None
+        self._gemini_lock = threading.Lock()
+        self.gemini_enabled = bool(self._api_key)
+
+        if self.gemini_enabled:
+            if diskcache is not None:
+                try:
+                    self._disk_cache = diskcache.Cache(str(GEMINI_CACHE_DIR))
+                except Exception as e:
+                    if self.logger:
+                        self.logger.log_exception(e, "ExplainAgent disk cache unavailable")
+            threading.Thread(target=self._warmup, daemon=True).start()
+        else:
+            self._log_info("ℹ️  No GEMINI_API_KEY found - running in offline mode")
+            self._warmed.set()
+
+        if self.logger:
+            self.logger.log_agent_call(
+                "ExplainAgent.__init__",
+                None,
+                "GeminiEnabled=%s",
+                self.gemini_enabled,
+            )
+
+    def _log_info(self, message: str) -> None:
+        # پیام‌های وضعیت از طریق logger (بدون print در مسیر درخواست)
+        if self.logger:
+            self.logger.log_info(message)
+
+    def _ensure_gemini(self) -> None:
+        """
+        Import google.generativeai and build the Gemini models on first use.
+
+        Raises if Gemini can't be set up; gemini_enabled is cleared so later
+        requests go straight to the offline templates.
+        """
+        if self.gemini_model is not None:
+            return
+
+        with self._gemini_lock:
+            if self.gemini_model is not None:
+                return
 
-        api_key = os.getenv("GEMINI_API_KEY")
+            genai = _load_genai()
+            if genai is None:
+                self.gemini_enabled = False
+                self._log_info("ℹ️  google-generativeai not installed - running in offline mode")
+                raise RuntimeError("google-generativeai is not installed")
 
-        if api_key and genai is not None:
             try:
-                genai.configure(api_key=api_key)
+                configure_genai(genai, self._api_key)
+                self.gemini_flash_model = genai.GenerativeModel(GEMINI_FLASH_MODEL)
                 self.gemini_model = genai.GenerativeModel("gemini-pro")
-                self.gemini_enabled = True
-                print("✅ Gemini API connected successfully! (model: gemini-pro)")
             except Exception as e:
                 self.gemini_enabled = False
-                print(f"⚠️  Gemini setup failed: {e}")
-                print("📝 Running in offline mode (using fallback templates)")
+                self._log_info(f"⚠️  Gemini setup failed: {e}")
+                self._log_info("📝 Running in offline mode (using fallback templates)")
                 if self.logger:
                     self.logger.log_exception(e, "ExplainAgent Gemini setup failed")
-        else:
-            self.gemini_enabled = False
-            if not api_key:
-                print("ℹ️  No GEMINI_API_KEY found - running in offline mode")
-            elif genai is None:
-                print("ℹ️  google-generativeai not installed - running in offline mode")
+                raise
+
+            self._genai = genai
+            self._log_info("✅ Gemini API connected successfully! (model: gemini-pro)")
+
+    def _model_for(self, tier: str) -> Any:
+        """Gemini model for a routing tier ("flash" or "pro")."""
+        self._ensure_gemini()
+        if tier == "flash" and self.gemini_flash_model is not None:
+            return self.gemini_flash_model
+        return self.gemini_model
+
+    def _warmup(self) -> None:
+        """
+        Set Gemini up and send a tiny request in a background thread, so the
+        import, DNS/TLS and the connection pool are ready before the first
+        real explanation.
+        """
+        t0 = time.perf_counter()
+        try:
+            self._ensure_gemini()
+            self.gemini_model.generate_content(
+                "ping",
+                generation_config={"max_output_tokens": 1},
+                request_options=GEMINI_REQUEST_OPTIONS,
+            )
+        except Exception:
+            pass  # warmup فقط بهینه‌سازی است
+        finally:
+            self._warmed.set()
 
         if self.logger:
-            self.logger.log_agent_call(
-                "ExplainAgent.__init__",
-                None,
-                f"GeminiEnabled={self.gemini_enabled}",
+            self.logger.log_tool_call(
+                "ExplainAgent._warmup",
+                {"ttft_ms": round((time.perf_counter() - t0) * 1000, 1)},
             )
 
     # ------------------------------------------------
@@ -101,15 +497,22 @@ class ExplainAgent:
         self,
         user_profile: UserProfile,
         country_ranking: CountryRanking,
+        bypass_cache: bool = False,
     ) -> str:
-        """Generate immigration explanation (Gemini or offline)"""
+        """
+        Generate immigration explanation (Gemini or offline).
+
+        bypass_cache=True skips the cached-response lookup and always asks
+        Gemini (the fresh answer still replaces the cached one).
+        """
 
         if self.logger:
             self.logger.log_agent_call(
                 "ExplainAgent.generate_explanation",
                 None,
-                f"user={user_profile.personal_info.first_name}, "
-                f"ranked={len(country_ranking.ranked_countries or [])}",
+                "user=%s, ranked=%d",
+                user_profile.personal_info.first_name,
+                len(country_ranking.ranked_countries or []),
             )
 
         # ✅ اگر هیچ کشوری ریکامند نشده، مستقیم یک توضیح اختصاصی بساز
@@ -130,34 +533,324 @@ class ExplainAgent:
 
         # از اینجا به بعد: حداقل یک کشور داریم → می‌تونیم Gemini یا fallback عادی را استفاده کنیم
 
-        # Try Gemini first
-        if self.gemini_enabled:
+        # Try Gemini first (unless the router says the template is enough)
+        tier = self._route(country_ranking) if self.gemini_enabled else "offline"
+        if tier != "offline":
             try:
-                print("🤖 Generating explanation with Gemini AI...")
-                output = self._generate_with_gemini(user_profile, country_ranking)
+                self._log_info(f"🤖 Generating explanation with Gemini AI ({tier})...")
+                model = self._model_for(tier)
+                output = self._generate_with_gemini(
+                    user_profile, country_ranking, model=model, bypass_cache=bypass_cache
+                )
                 if self.logger:
                     self.logger.log_tool_call(
                         "ExplainAgent.generate_explanation",
-                        {"mode": "gemini", "chars": len(output)},
+                        {"mode": "gemini", "tier": tier, "chars": len(output)},
                     )
                 return output
             except Exception as e:
                 if self.logger:
                     self.logger.log_exception(e, "Gemini generation failed")
-                print(f"⚠️  Gemini API failed: {e}")
-                print("📝 Switching to offline mode...")
+                self._log_info(f"⚠️  Gemini API failed: {e}")
+                self._log_info("📝 Switching to offline mode...")
         else:
-            print("📝 Generating explanation in offline mode (no AI)...")
+            self._log_info("📝 Generating explanation in offline mode (no AI)...")
 
         # Fallback mode (بدون Gemini)
         output = self._generate_fallback(user_profile, country_ranking)
         if self.logger:
             self.logger.log_tool_call(
                 "ExplainAgent.generate_explanation",
-                {"mode": "offline", "chars": len(output)},
+                {"mode": "offline", "tier": tier, "chars": len(output)},
             )
         return output
 
+    def generate_explanation_cached(
+        self,
+        user_profile: UserProfile,
+        country_ranking: CountryRanking,
+    ) -> str:
+        """
+        Non-blocking variant of generate_explanation.
+
+        Returns the cached Gemini explanation when there is one. Otherwise
+        the offline explanation is returned right away and the Gemini one is
+        generated in the background, so a re-submit of the same profile
+        and ranking gets it from the cache.
+        """
+
+        if not country_ranking.ranked_countries:
+            return self._generate_no_recommendation_explanation(
+                user_profile,
+                country_ranking,
+            )
+
+        tier = self._route(country_ranking) if self.gemini_enabled else "offline"
+        if tier != "offline" and not GEMINI_CACHE_DISABLED:
+            cache_key = _prompt_cache_key(user_profile, country_ranking)
+            cached = self._cached_response(cache_key)
+            if cached is not None:
+                return cached
+            self._refresh_in_background(cache_key, user_profile, country_ranking, tier)
+
+        return self._generate_fallback(user_profile, country_ranking)
+
+    def _refresh_in_background(
+        self,
+        cache_key: str,
+        user_profile: UserProfile,
+        ranking: CountryRanking,
+        tier: str,
+    ) -> None:
+        """Generate and cache the Gemini explanation once per key, off-thread."""
+        with self._refresh_lock:
+            if cache_key in self._refreshing:
+                return
+            self._refreshing.add(cache_key)
+
+        def refresh() -> None:
+            try:
+                self._generate_with_gemini(
+                    user_profile, ranking, model=self._model_for(tier)
+                )
+            except Exception as e:
+                if self.logger:
+                    self.logger.log_exception(e, "Background Gemini generation failed")
+            finally:
+                with self._refresh_lock:
+                    self._refreshing.discard(cache_key)
+
+        _REFRESH_POOL.submit(refresh)
+
+    def _route(self, ranking: CountryRanking) -> str:
+        """
+        Pick the cheapest tier that can explain this ranking:
+          - "offline": the top country is a clear winner (score ≥ ROUTE_OFFLINE_SCORE)
+          - "flash":   single option or a wide lead over the runner-up
+          - "pro":     close call between options – worth the bigger model
+        """
+        ranked = ranking.ranked_countries
+        top_score = ranked[0].score
+        if top_score >= ROUTE_OFFLINE_SCORE:
+            return "offline"
+        if len(ranked) == 1 or top_score - ranked[1].score >= ROUTE_FLASH_LEAD:
+            return "flash"
+        return "pro"
+
+    async def agenerate_explanation(
+        self,
+        user_profile: UserProfile,
+        country_ranking: CountryRanking,
+    ) -> str:
+        """
+        Async variant of generate_explanation.
+
+        The web search runs in a worker thread while the prompt is being
+        built, and Gemini is awaited instead of blocking the event loop.
+        """
+
+        if self.logger:
+            self.logger.log_agent_call(
+                "ExplainAgent.agenerate_explanation",
+                None,
+                "user=%s, ranked=%d",
+                user_profile.personal_info.first_name,
+                len(country_ranking.ranked_countries or []),
+            )
+
+        if not country_ranking.ranked_countries:
+            return self._generate_no_recommendation_explanation(
+                user_profile,
+                country_ranking,
+            )
+
+        tier = self._route(country_ranking) if self.gemini_enabled else "offline"
+        if tier != "offline":
+            try:
+                model = self._model_for(tier)
+                output = await self._agenerate_with_gemini(
+                    user_profile, country_ranking, model=model
+                )
+                if self.logger:
+                    self.logger.log_tool_call(
+                        "ExplainAgent.agenerate_explanation",
+                        {"mode": "gemini", "tier": tier, "chars": len(output)},
+                    )
+                return output
+            except Exception as e:
+                if self.logger:
+                    self.logger.log_exception(e, "Gemini async generation failed")
+                self._log_info(f"⚠️  Gemini API failed: {e}")
+                self._log_info("📝 Switching to offline mode...")
+
+        # fallback هم سرچ sync انجام می‌دهد → در thread جدا
+        output = await asyncio.to_thread(
+            self._generate_fallback, user_profile, country_ranking
+        )
+        if self.logger:
+            self.logger.log_tool_call(
+                "ExplainAgent.agenerate_explanation",
+                {"mode": "offline", "tier": tier, "chars": len(output)},
+            )
+        return output
+
+    async def agenerate_explanations(
+        self,
+        requests: List[Tuple[UserProfile, CountryRanking]],
+    ) -> List[str]:
+        """
+        Generate explanations for several users concurrently, aligned with
+        the input order.
+
+        Each item goes through agenerate_explanation (with its own offline
+        fallback), at most ASYNC_MAX_CONCURRENCY at a time, so total latency
+        is close to the slowest call instead of the sum.
+        """
+
+        limit = asyncio.Semaphore(ASYNC_MAX_CONCURRENCY)
+
+        async def one(user_profile: UserProfile, country_ranking: CountryRanking) -> str:
+            async with limit:
+                return await self.agenerate_explanation(user_profile, country_ranking)
+
+        return list(await asyncio.gather(*(one(u, r) for u, r in requests)))
+
+    def generate_explanation_stream(
+        self,
+        user_profile: UserProfile,
+        country_ranking: CountryRanking,
+    ) -> Iterator[str]:
+        """
+        Streaming variant of generate_explanation.
+
+        Gemini output is yielded chunk by chunk as it arrives, so a UI can
+        start rendering before generation finishes. Offline and
+        no-recommendation explanations are yielded as a single chunk.
+        """
+
+        if not country_ranking.ranked_countries:
+            yield self._generate_no_recommendation_explanation(
+                user_profile,
+                country_ranking,
+            )
+            return
+
+        tier = self._route(country_ranking) if self.gemini_enabled else "offline"
+        if tier != "offline":
+            started = False
+            try:
+                model = self._model_for(tier)
+                for chunk in self._stream_with_gemini(
+                    user_profile, country_ranking, model=model
+                ):
+                    started = True
+                    yield chunk
+                return
+            except Exception as e:
+                # بعد از شروع استریم نمی‌توانیم به حالت آفلاین برگردیم
+                if started:
+                    raise
+                if self.logger:
+                    self.logger.log_exception(e, "Gemini streaming failed")
+                self._log_info(f"⚠️  Gemini API failed: {e}")
+                self._log_info("📝 Switching to offline mode...")
+
+        yield self._generate_fallback(user_profile, country_ranking)
+
+    async def agenerate_explanation_stream(
+        self,
+        user_profile: UserProfile,
+        country_ranking: CountryRanking,
+    ) -> AsyncIterator[str]:
+        """Async variant of generate_explanation_stream."""
+
+        if not country_ranking.ranked_countries:
+            yield self._generate_no_recommendation_explanation(
+                user_profile,
+                country_ranking,
+            )
+            return
+
+        tier = self._route(country_ranking) if self.gemini_enabled else "offline"
+        if tier != "offline":
+            started = False
+            try:
+                model = self._model_for(tier)
+                async for chunk in self._astream_with_gemini(
+                    user_profile, country_ranking, model=model
+                ):
+                    started = True
+                    yield chunk
+                return
+            except Exception as e:
+                # بعد از شروع استریم نمی‌توانیم به حالت آفلاین برگردیم
+                if started:
+                    raise
+                if self.logger:
+                    self.logger.log_exception(e, "Gemini async streaming failed")
+                self._log_info(f"⚠️  Gemini API failed: {e}")
+                self._log_info("📝 Switching to offline mode...")
+
+        yield await asyncio.to_thread(
+            self._generate_fallback, user_profile, country_ranking
+        )
+
+    def generate_explanations_batch(
+        self,
+        requests: List[Tuple[UserProfile, CountryRanking]],
+        batch_size: int = BATCH_MAX_SIZE,
+    ) -> List[str]:
+        """
+        Generate explanations for several users, aligned with the input order.
+
+        Each user is routed like a single call (_route). Only "pro" users
+        share one Gemini request per batch_size items, and the batches are
+        sent concurrently. Everyone else goes through generate_explanation:
+        offline users get the template and flash users the flash model.
+        That also covers every user when Gemini is off or a batch reply
+        can't be split.
+        """
+
+        outputs: List[Optional[str]] = [None] * len(requests)
+
+        pending: List[int] = []
+        if self.gemini_enabled:
+            for i, (user_profile, ranking) in enumerate(requests):
+                if not ranking.ranked_countries or self._route(ranking) != "pro":
+                    continue
+                cached = self._cached_response(_prompt_cache_key(user_profile, ranking))
+                if cached is not None:
+                    outputs[i] = cached
+                else:
+                    pending.append(i)
+
+        chunks = [
+            pending[start:start + batch_size]
+            for start in range(0, len(pending), batch_size)
+        ]
+        if chunks:
+            with ThreadPoolExecutor(max_workers=min(len(chunks), BATCH_MAX_PARALLEL)) as pool:
+                futures = [
+                    pool.submit(self._generate_batch_with_gemini, [requests[i] for i in chunk])
+                    for chunk in chunks
+                ]
+                for chunk, future in zip(chunks, futures):
+                    try:
+                        texts = future.result()
+                    except Exception as e:
+                        if self.logger:
+                            self.logger.log_exception(e, "Gemini batch generation failed")
+                        self._log_info(f"⚠️  Gemini batch failed: {e}")
+                        continue
+                    for i, text in zip(chunk, texts):
+                        outputs[i] = text
+
+        for i, (user_profile, ranking) in enumerate(requests):
+            if outputs[i] is None:
+                outputs[i] = self.generate_explanation(user_profile, ranking)
+
+        return outputs
+
     # ------------------------------------------------
     # Gemini mode
     # ------------------------------------------------
@@ -165,6 +858,8 @@ class ExplainAgent:
         self,
         user_profile: UserProfile,
         ranking: CountryRanking,
+        model: Any = None,
+        bypass_cache: bool = False,
     ) -> str:
         """Generate explanation using Gemini AI with enhanced search"""
 
@@ -173,69 +868,428 @@ class ExplainAgent:
             # اما برای اطمینان یک پیام ساده نگه می‌داریم
             return "❌ No recommended countries found for your profile."
 
+        return "".join(
+            self._stream_with_gemini(user_profile, ranking, model, bypass_cache)
+        ).strip()
+
+    def _stream_with_gemini(
+        self,
+        user_profile: UserProfile,
+        ranking: CountryRanking,
+        model: Any = None,
+        bypass_cache: bool = False,
+    ) -> Iterator[str]:
+        """Yield Gemini output chunks as they arrive (cached text in one chunk)."""
+
+        model = model or self._model_for("pro")
+
         top = ranking.ranked_countries[0]
 
+        cache_key = _prompt_cache_key(user_profile, ranking)
+        cached = None if bypass_cache else self._cached_response(cache_key)
+        if cached is not None:
+            if self.logger:
+                self.logger.log_tool_call(
+                    "ExplainAgent._generate_with_gemini",
+                    {"cache": "hit", "country": top.country},
+                )
+            yield cached
+            return
+
+        prompt = self._build_gemini_prompt(user_profile, ranking)
+
+        chunks: List[str] = []
+        ttft = None
+        t0 = time.perf_counter()
+        for chunk in model.generate_content(
+            prompt, stream=True, request_options=GEMINI_REQUEST_OPTIONS
+        ):
+            text = _response_text(chunk)
+            if not text:
+                continue
+            if ttft is None:
+                ttft = time.perf_counter() - t0
+            chunks.append(text)
+            yield text
+
+        if self.logger:
+            self.logger.log_tool_call(
+                "ExplainAgent._generate_with_gemini",
+                {
+                    "cache": "miss",
+                    "ttft_ms": round(ttft * 1000, 1) if ttft is not None else None,
+                    "total_ms": round((time.perf_counter() - t0) * 1000, 1),
+                    "chunks": len(chunks),
+                },
+            )
+
+        text = "".join(chunks).strip()
+        if not text:
+            # پاسخ خالی/بلاک‌شده → خطا تا fallback آفلاین اجرا شود
+            raise ValueError("Gemini returned no text")
+        self._store_response(cache_key, text)
+
+    def _build_gemini_prompt(
+        self,
+        user_profile: UserProfile,
+        ranking: CountryRanking,
+    ) -> str:
+        """Static advisor instructions + profile, ranking and web search context."""
+
+        top = ranking.ranked_countries[0]
+        return _format_gemini_prompt(
+            top.country,
+            self._model_json(user_profile),
+            self._model_json(ranking),
+            self._search_context(ranking),
+        )
+
+    def _search_context(self, ranking: CountryRanking) -> str:
+        """
+        Latest visa info for the top SEARCH_TOP_K countries, formatted for
+        the prompt. The searches are I/O-bound, so they run concurrently.
+        """
+
+        if not self.search_tool:
+            return ""
+
         # ✅ استفاده از SearchTool برای اطلاعات تازه
-        search_context = ""
-        if self.search_tool:
-            print(f"   🔍 Searching for latest {top.country} visa information...")
-            try:
-                search_results = self.search_tool.search_immigration(
-                    query="visa requirements",
-                    country=top.country,
-                    pathway=top.pathway or "Work",
-                    max_results=3,
+        countries = ranking.ranked_countries[:SEARCH_TOP_K]
+        self._log_info(
+            "   🔍 Searching for latest visa information: "
+            + ", ".join(c.country for c in countries)
+        )
+        return _format_search_context(
+            countries, _SEARCH_POOL.map(self._search_country, countries)
+        )
+
+    def _search_country(self, country: RankedCountry) -> List[Dict[str, Any]]:
+        return self._visa_search(country.country, country.pathway or "Work")
+
+    # ------------------------------------------------
+    # Search prewarming
+    # ------------------------------------------------
+    def prewarm_search(self, ranking: CountryRanking) -> None:
+        """
+        Start the visa searches generate_explanation will need for this
+        ranking in the background.
+
+        Only the countries the chosen route reads are searched: the top
+        SEARCH_TOP_K for a Gemini prompt, the top one for the offline
+        template. Results land in the shared search cache, so the later
+        lookup is a cache hit (or joins the search if it is still running).
+        """
+        if not self.search_tool or not ranking.ranked_countries:
+            return
+        tier = self._route(ranking) if self.gemini_enabled else "offline"
+        limit = 1 if tier == "offline" else SEARCH_TOP_K
+        for country in ranking.ranked_countries[:limit]:
+            _SEARCH_POOL.submit(self._search_country, country)
+
+    def _visa_search(self, country: str, pathway: str) -> List[Dict[str, Any]]:
+        """Visa search results for the prompt / offline template."""
+        return self._cached_search(country=country, pathway=pathway, max_results=2)
+
+    def _generate_batch_with_gemini(
+        self,
+        requests: List[Tuple[UserProfile, CountryRanking]],
+    ) -> List[str]:
+        """One Gemini call for several users; raises if the reply can't be split."""
+
+        blocks = []
+        for n, (user_profile, ranking) in enumerate(requests, 1):
+            top = ranking.ranked_countries[0]
+            blocks.append(f"\n=== USER {n} ===\n")
+            blocks.append(
+                _USER_BLOCK_TMPL.format(
+                    top_country=top.country,
+                    profile_json=self._model_json(user_profile),
+                    ranking_json=self._model_json(ranking),
+                    search_context=self._search_context(ranking),
                 )
+            )
 
-                if search_results:
-                    search_context = "\n\nLATEST INFORMATION FROM WEB:\n"
-                    for i, result in enumerate(search_results[:2], 1):
-                        title = result.get("title", "")
-                        snippet = result.get("snippet", "")
-                        search_context += f"{i}. {title}\n   {snippet}\n"
-            except Exception as e:
-                print(f"   ⚠️  Search failed: {e}")
+        prompt = (
+            STATIC_ADVISOR_PROMPT
+            + f"\nWrite {len(requests)} independent explanations, one per USER block "
+            f"below and in the same order. Separate them with a line containing "
+            f"only {BATCH_SEPARATOR}.\n"
+            + "".join(blocks)
+        )
 
-        prompt = f"""
-You are an expert immigration advisor. Provide a clear, friendly recommendation.
+        result = self._model_for("pro").generate_content(
+            prompt, request_options=GEMINI_REQUEST_OPTIONS
+        )
+        texts = [t.strip() for t in _response_text(result).split(BATCH_SEPARATOR)]
+        texts = [t for t in texts if t]
+        if len(texts) != len(requests):
+            raise ValueError(
+                f"expected {len(requests)} explanations, got {len(texts)}"
+            )
 
-USER PROFILE:
-{user_profile.model_dump_json(indent=2)}
+        for (user_profile, ranking), text in zip(requests, texts):
+            self._store_response(_prompt_cache_key(user_profile, ranking), text)
+        if self.logger:
+            self.logger.log_tool_call(
+                "ExplainAgent._generate_batch_with_gemini",
+                {"batch_size": len(requests), "chars": sum(map(len, texts))},
+            )
+        return texts
 
-COUNTRY RANKING:
-{ranking.model_dump_json(indent=2)}
+    def _model_json(self, model: BaseModel) -> str:
+        """
+        Compact JSON for a profile/ranking, memoized per object.
 
-{search_context}
+        Only the fields the prompt's TASK refers to are sent (profile
+        projection + top PROMPT_MAX_RANKED countries), without nulls or
+        pretty-printing, to cut input tokens; retries, batches and cache
+        probes on the same object reuse the serialized form.
+        """
+        key = id(model)
+        with self._json_cache_lock:
+            entry = self._json_cache.get(key)
+            if entry is not None and entry[0] is model:
+                self._json_cache.move_to_end(key)
+                return entry[1]
+
+        if isinstance(model, UserProfile):
+            data = model.model_dump(
+                mode="json",
+                include=_PROMPT_PROFILE_FIELDS,
+                exclude_none=True,
+                exclude_defaults=True,
+            )
+        elif isinstance(model, CountryRanking):
+            data = {
+                "ranked_countries": [
+                    c.model_dump(mode="json", exclude_none=True)
+                    for c in model.ranked_countries[:PROMPT_MAX_RANKED]
+                ]
+            }
+        else:
+            data = model.model_dump(mode="json", exclude_none=True, exclude_defaults=True)
 
-TASK:
-1. Explain why "{top.country}" is the best match.
-2. Summarize the user's key qualifications.
-3. List 2-3 strengths.
-4. List 1-2 areas for improvement.
-5. Suggest next steps.
-6. If available, incorporate the latest visa information from web search.
+        text = _dumps(data)
+        with self._json_cache_lock:
+            self._json_cache[key] = (model, text)
+            self._json_cache.move_to_end(key)
+            if len(self._json_cache) > JSON_CACHE_SIZE:
+                self._json_cache.popitem(last=False)
+        return text
 
-Keep it concise, professional, and encouraging.
-Format in Markdown.
-"""
+    def _cached_search(
+        self,
+        country: str,
+        pathway: str,
+        max_results: int,
+        query: str = "visa requirements",
+    ) -> List[Dict[str, Any]]:
+        """
+        SearchTool lookup through a process-wide TTL cache.
 
-        result = self.gemini_model.generate_content(prompt)
+        Visa pages change on a daily-or-slower scale, so users with the same
+        top country share one search for SEARCH_CACHE_TTL seconds. A failed
+        search is remembered as "no results" for SEARCH_FAILURE_TTL, so a
+        broken backend isn't hammered by every request.
 
-        # ✅ پردازش response به شکل امن
-        text = None
-        if hasattr(result, "text"):
-            text = result.text
-        elif hasattr(result, "candidates") and result.candidates:
+        Concurrent lookups of the same key share one search: the others
+        wait up to PREWARM_WAIT_SECONDS for it, then search on their own.
+        """
+        # mock results must never be served to a tool doing real searches
+        live = getattr(self.search_tool, "search_func", None) is not None
+        key = (live, query, country, pathway, max_results)
+        now = time.monotonic()
+        with _SEARCH_CACHE_LOCK:
+            entry = _SEARCH_CACHE.get(key)
+            if entry is not None and now < entry[0]:
+                _SEARCH_CACHE.move_to_end(key)
+                return entry[1]
+            in_flight = _SEARCH_IN_FLIGHT.get(key)
+            if in_flight is None:
+                _SEARCH_IN_FLIGHT[key] = Future()
+
+        if in_flight is not None:
             try:
-                parts = result.candidates[0].content.parts
-                text = "".join(p.text for p in parts if hasattr(p, "text"))
+                return in_flight.result(timeout=PREWARM_WAIT_SECONDS)
             except Exception:
-                pass
+                pass  # اگر سرچ در جریان کند بود، سرچ خودمان را می‌زنیم
+            return self._run_search(key, country, pathway, max_results, query, now)
+
+        results: List[Dict[str, Any]] = []
+        try:
+            results = self._run_search(key, country, pathway, max_results, query, now)
+        finally:
+            with _SEARCH_CACHE_LOCK:
+                future = _SEARCH_IN_FLIGHT.pop(key)
+            future.set_result(results)
+        return results
+
+    def _run_search(
+        self,
+        key: Tuple[bool, str, str, str, int],
+        country: str,
+        pathway: str,
+        max_results: int,
+        query: str,
+        now: float,
+    ) -> List[Dict[str, Any]]:
+        """Call SearchTool and store the result (or the failure) in the cache."""
+        try:
+            results = self.search_tool.search_immigration(
+                query=query,
+                country=country,
+                pathway=pathway,
+                max_results=max_results,
+            )
+            expires = now + SEARCH_CACHE_TTL
+        except Exception as e:
+            self._log_info(f"   ⚠️  Search failed for {country}: {e}")
+            results = []
+            expires = now + SEARCH_FAILURE_TTL
+
+        with _SEARCH_CACHE_LOCK:
+            _SEARCH_CACHE[key] = (expires, results)
+            _SEARCH_CACHE.move_to_end(key)
+            if len(_SEARCH_CACHE) > SEARCH_CACHE_SIZE:
+                _SEARCH_CACHE.popitem(last=False)
+        return results
+
+    # ------------------------------------------------
+    # Async Gemini mode
+    # ------------------------------------------------
+    async def _agenerate_with_gemini(
+        self,
+        user_profile: UserProfile,
+        ranking: CountryRanking,
+        model: Any = None,
+    ) -> str:
+        """Async Gemini call (single response)."""
+
+        model = model or self._model_for("pro")
+
+        cache_key = _prompt_cache_key(user_profile, ranking)
+        cached = self._cached_response(cache_key)
+        if cached is not None:
+            return cached
+
+        prompt = await self._abuild_gemini_prompt(user_profile, ranking)
+        result = await model.generate_content_async(
+            prompt, request_options=GEMINI_REQUEST_OPTIONS
+        )
 
+        text = _response_text(result).strip()
         if not text:
-            text = str(result)
+            raise ValueError("Gemini returned no text")
+        self._store_response(cache_key, text)
+        return text
 
-        return text.strip()
+    async def _astream_with_gemini(
+        self,
+        user_profile: UserProfile,
+        ranking: CountryRanking,
+        model: Any = None,
+    ) -> AsyncIterator[str]:
+        """Async counterpart of _stream_with_gemini."""
+
+        model = model or self._model_for("pro")
+
+        cache_key = _prompt_cache_key(user_profile, ranking)
+        cached = self._cached_response(cache_key)
+        if cached is not None:
+            yield cached
+            return
+
+        prompt = await self._abuild_gemini_prompt(user_profile, ranking)
+
+        chunks: List[str] = []
+        async for chunk in await model.generate_content_async(
+            prompt, stream=True, request_options=GEMINI_REQUEST_OPTIONS
+        ):
+            text = _response_text(chunk)
+            if text:
+                chunks.append(text)
+                yield text
+
+        text = "".join(chunks).strip()
+        if not text:
+            raise ValueError("Gemini returned no text")
+        self._store_response(cache_key, text)
+
+    async def _abuild_gemini_prompt(
+        self,
+        user_profile: UserProfile,
+        ranking: CountryRanking,
+    ) -> str:
+        """
+        Async prompt builder. The per-country web searches run concurrently
+        (asyncio.gather) while the profile and ranking are serialized.
+        """
+
+        top = ranking.ranked_countries[0]
+        countries = ranking.ranked_countries[:SEARCH_TOP_K]
+        searches = None
+        if self.search_tool:
+            searches = asyncio.gather(*(
+                asyncio.to_thread(self._search_country, country)
+                for country in countries
+            ))
+
+        profile_json = self._model_json(user_profile)
+        ranking_json = self._model_json(ranking)
+
+        search_context = ""
+        if searches is not None:
+            try:
+                search_context = _format_search_context(
+                    countries,
+                    await asyncio.wait_for(searches, timeout=SEARCH_TIMEOUT_SECONDS),
+                )
+            except asyncio.TimeoutError:
+                self._log_info("   ⚠️  Search timed out - continuing without web info")
+
+        return _format_gemini_prompt(top.country, profile_json, ranking_json, search_context)
+
+    # ------------------------------------------------
+    # Gemini response cache
+    # ------------------------------------------------
+    def _cached_response(self, key: str) -> Optional[str]:
+        """Look up a cached Gemini response (memory first, then disk)."""
+        if GEMINI_CACHE_DISABLED:
+            return None
+
+        with self._response_cache_lock:
+            text = self._response_cache.get(key)
+            if text is not None:
+                self._response_cache.move_to_end(key)
+                return text
+
+        if self._disk_cache is not None:
+            try:
+                text = self._disk_cache.get(key)
+            except Exception:
+                text = None
+            if text is not None:
+                self._remember(key, text)
+        return text
+
+    def _store_response(self, key: str, text: str) -> None:
+        """Save a Gemini response in both cache layers."""
+        if GEMINI_CACHE_DISABLED:
+            return
+
+        self._remember(key, text)
+        if self._disk_cache is not None:
+            try:
+                self._disk_cache.set(key, text, expire=GEMINI_CACHE_TTL)
+            except Exception:
+                pass  # کش دیسک اختیاری است
+
+    def _remember(self, key: str, text: str) -> None:
+        with self._response_cache_lock:
+            self._response_cache[key] = text
+            self._response_cache.move_to_end(key)
+            if len(self._response_cache) > GEMINI_MEMORY_CACHE_SIZE:
+                self._response_cache.popitem(last=False)
 
     # ------------------------------------------------
     # Case: no recommended countries
@@ -250,62 +1304,30 @@ Format in Markdown.
         که چرا هیچ پیشنهادی وجود ندارد (با تأکید روی پول، هدف، و پروفایل).
         """
 
-        personal = user_profile.personal_info
-        edu = user_profile.education
-        work = user_profile.work_experience
-        lang = user_profile.language_proficiency
-        finance = user_profile.financial_info
-
-        funds = float(finance.liquid_assets_usd or 0.0)
-        goal_raw = (user_profile.immigration_goal or "").strip().lower()
+        funds = float(user_profile.financial_info.liquid_assets_usd or 0.0)
 
-        # ✅ حداقل پول بر اساس هدف
-        if goal_raw == "study":
-            hard_limit = 11000.0   # تقریبی بر اساس rules فعلی برای استادی
-            goal_label = "Study"
-        elif goal_raw == "pr":
-            hard_limit = 8000.0
-            goal_label = "Permanent Residence (PR)"
-        else:
-            # Work یا چیز دیگر
-            hard_limit = 4000.0
-            goal_label = "Work"
+        # ✅ حداقل پول بر اساس هدف (Work یا چیز دیگر → پیش‌فرض)
+        hard_limit, goal_label = _GOAL_LIMITS.get(
+            (user_profile.immigration_goal or "work").strip().casefold(),
+            _DEFAULT_GOAL_LIMIT,
+        )
 
         # 🔥 اگر پول زیر حد این هدف است → دلیل اصلی = پول
         if funds < hard_limit:
-            return (
-                "❌ **No recommended countries found for your profile.**\n\n"
-                "### Main Reason: Insufficient Funds for Your Goal\n"
-                f"- Your available funds: **${funds:,.0f} USD**\n"
-                f"- Minimum realistic funds for **{goal_label}** pathways: "
-                f"**around ${hard_limit:,.0f} USD or more** (for a single applicant)\n\n"
-                "Most study/work/PR visas require you to prove you can pay your living "
-                "costs for at least one year (and sometimes tuition as well). With your "
-                "current savings, your application would be **very high risk** in almost "
-                "all target countries.\n\n"
-                "### What You Can Do:\n"
-                "1. Increase your savings (ideally above this minimum level).\n"
-                "2. Consider cheaper destinations or work-based routes instead of study.\n"
-                "3. Look for scholarships or fully-funded programs to reduce required funds.\n\n"
-                "💡 When your funds increase, re-run the Immigration Pathfinder for new recommendations."
+            return _INSUFFICIENT_FUNDS_TMPL.format(
+                funds=funds,
+                hard_limit=hard_limit,
+                goal_label=goal_label,
             )
 
         # ✅ اگر مشکل اصلی پول نبوده، یک پیام عمومی‌تر (سن/زبان/قوانین)
-        return (
-            "❌ **No recommended countries found for your profile.**\n\n"
-            "This usually happens when:\n"
-            "- Your current profile (age, degree, English, funds) does not reach the minimum thresholds, or\n"
-            "- All options are classified as **high risk** for visa approval.\n\n"
-            "### Quick Summary of Your Profile:\n"
-            f"- Age: **{personal.age}**\n"
-            f"- Education: **{edu.degree_level} in {edu.field_of_study or 'N/A'}**\n"
-            f"- Work Experience: **{work.years_of_experience} years**\n"
-            f"- IELTS: **{lang.ielts_score or 0}**\n"
-            f"- Available Funds: **${funds:,.0f} USD**\n\n"
-            "### Suggestions:\n"
-            "- Improve your English score (IELTS 6.0–6.5+ for most Study/Work paths).\n"
-            "- Increase your savings if possible.\n"
-            "- Consider adjusting your goal (e.g., Work instead of Study) or your target countries.\n"
+        return _NO_MATCH_TMPL.format(
+            age=user_profile.personal_info.age,
+            degree=user_profile.education.degree_level,
+            field=user_profile.education.field_of_study or "N/A",
+            years=user_profile.work_experience.years_of_experience,
+            ielts=user_profile.language_proficiency.ielts_score or 0,
+            funds=funds,
         )
 
     # ------------------------------------------------
@@ -334,103 +1356,67 @@ Format in Markdown.
         search_info = ""
         if self.search_tool:
             try:
-                results = self.search_tool.search_immigration(
-                    query="visa requirements",
-                    country=top.country,
-                    pathway=top.pathway or "Work",
-                    max_results=2,
-                )
+                results = self._visa_search(top.country, top.pathway or "Work")
                 if results and results[0].get("snippet"):
                     snippet = results[0]["snippet"][:200]
                     search_info = f"\n💡 **Latest Info:** {snippet}...\n"
             except Exception:
                 pass  # اگر سرچ خراب شد، توضیح اصلی را ادامه می‌دهیم
 
-        explanation = f"🌍 **Immigration Recommendation for {personal.first_name}**\n\n"
-        explanation += "═══════════════════════════════════════\n\n"
-
-        # Top recommendation
-        explanation += f"🥇 **Top Choice: {top.country}**\n"
-        explanation += f"   Pathway: {top.pathway or 'Work/Study'}\n"
-        explanation += f"   Match Score: {getattr(top, 'score', 'N/A')}\n"
-
-        if search_info:
-            explanation += search_info
-
-        explanation += "\n"
-
-        # Profile summary
-        explanation += "📋 **Your Profile:**\n"
-        explanation += f"   • Age: {personal.age} years\n"
-        explanation += f"   • Nationality: {personal.nationality}\n"
-        explanation += f"   • Education: {edu.degree_level} in {edu.field_of_study}\n"
-        explanation += (
-            f"   • Experience: {work.years_of_experience} years as {work.occupation}\n"
-        )
-        explanation += (
-            f"   • English: IELTS {lang.ielts_score if lang.ielts_score else 'Not provided'}\n"
-        )
-        explanation += f"   • Funds: ${finance.liquid_assets_usd:,.2f} USD\n\n"
-
-        # Strengths
-        explanation += "✅ **Your Strengths:**\n"
-        strengths = []
-
-        if edu.degree_level in ["bachelor", "master", "phd"]:
-            strengths.append(f"   • Strong educational background ({edu.degree_level})")
-
-        if work.years_of_experience >= 2:
-            strengths.append(
-                f"   • Valuable work experience ({work.years_of_experience} years)"
+        parts: List[str] = [
+            _FALLBACK_HEADER_TMPL.format(
+                first_name=personal.first_name,
+                country=top.country,
+                pathway=top.pathway or "Work/Study",
+                score=getattr(top, "score", "N/A"),
+                search_info=search_info,
+                age=personal.age,
+                nationality=personal.nationality,
+                degree=edu.degree_level,
+                field=edu.field_of_study,
+                years=work.years_of_experience,
+                occupation=work.occupation,
+                ielts=lang.ielts_score if lang.ielts_score else "Not provided",
+                funds=finance.liquid_assets_usd,
             )
+        ]
 
-        if finance.liquid_assets_usd >= 10000:
-            strengths.append(
-                f"   • Solid financial foundation (${finance.liquid_assets_usd:,.0f})"
-            )
-
-        if lang.ielts_score and lang.ielts_score >= 6.5:
-            strengths.append(
-                f"   • Good English proficiency (IELTS {lang.ielts_score})"
-            )
-
-        if not strengths:
-            strengths.append("   • Eligible for multiple immigration pathways")
-
-        explanation += "\n".join(strengths) + "\n\n"
+        # Strengths
+        parts.append("✅ **Your Strengths:**\n")
+        fields = {
+            "degree": edu.degree_level,
+            "years": work.years_of_experience,
+            "funds": finance.liquid_assets_usd,
+            "ielts": lang.ielts_score,
+        }
+        strengths = [
+            template.format(**fields)
+            for applies, template in _STRENGTH_RULES
+            if applies(user_profile)
+        ] or ["   • Eligible for multiple immigration pathways"]
+
+        parts.append("\n".join(strengths))
+        parts.append("\n\n")
 
         # Areas for improvement
-        explanation += "💡 **Consider Improving:**\n"
-        improvements = []
-
-        if not lang.ielts_score or lang.ielts_score < 6.5:
-            improvements.append("   • Take IELTS test to improve your language score")
-
-        if finance.liquid_assets_usd < 15000:
-            improvements.append("   • Build more savings for settlement funds")
-
-        if work.years_of_experience < 3:
-            improvements.append("   • Gain more work experience in your field")
+        parts.append("💡 **Consider Improving:**\n")
+        improvements = [
+            template for applies, template in _IMPROVEMENT_RULES if applies(user_profile)
+        ]
 
         if improvements:
-            explanation += "\n".join(improvements) + "\n\n"
+            parts.append("\n".join(improvements))
+            parts.append("\n\n")
         else:
-            explanation += "   • Your profile is strong! Focus on the application process.\n\n"
+            parts.append("   • Your profile is strong! Focus on the application process.\n\n")
 
         # Second recommendation (optional)
         if len(ranking.ranked_countries) > 1:
             second = ranking.ranked_countries[1]
-            explanation += f"🥈 **Alternative: {second.country}**\n"
-            explanation += f"   Pathway: {second.pathway or 'Work/Study'}\n\n"
-
-        # Next steps
-        explanation += "🎯 **Next Steps:**\n"
-        explanation += "   1. Research visa requirements for your top choice.\n"
-        explanation += "   2. Prepare necessary documents (diplomas, work letters).\n"
-        explanation += "   3. Take/improve IELTS if needed.\n"
-        explanation += "   4. Consider consulting with a licensed immigration consultant.\n\n"
+            parts.append(f"🥈 **Alternative: {second.country}**\n")
+            parts.append(f"   Pathway: {second.pathway or 'Work/Study'}\n\n")
 
-        explanation += "═══════════════════════════════════════\n"
-        explanation += "💬 Good luck with your immigration journey!\n"
+        # Next steps + closing
+        parts.append(FALLBACK_FOOTER)
 
-        return explanation
+        return "".join(parts)
@@ -1,9 +1,15 @@
 # agents/match_agent.py
 
 import sys
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from enum import IntEnum
 from pathlib import Path
+from types import MappingProxyType
 from typing import List, Dict, Any, Tuple, Optional
 
+import numpy as np
+
 # Add project root so we can import tools, rules, agents, ...
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 if str(PROJECT_ROOT) not in sys.path:
@@ -19,20 +25,148 @@ LOGGER_DEFAULT_ENABLED = False
 # از تنظیم اصلی logger استفاده می‌کنیم
 LOGGING_ENABLED = LOGGER_DEFAULT_ENABLED
 
+from agents._match_kernel import penalty_counts, penalty_counts_np
+
+class Degree(IntEnum):
+    """Degree rank; higher is a higher qualification."""
+
+    UNKNOWN = -1
+    HIGH_SCHOOL = 0
+    DIPLOMA = 1
+    BACHELOR = 2
+    MASTER = 3
+    PHD = 4
+
+
 DEGREE_ORDER = {
-    "high school": 0,
-    "high_school": 0,
-    "diploma": 1,
-    "bachelor": 2,
-    "master": 3,
-    "phd": 4,
+    "high school": Degree.HIGH_SCHOOL,
+    "high_school": Degree.HIGH_SCHOOL,
+    "diploma": Degree.DIPLOMA,
+    "bachelor": Degree.BACHELOR,
+    "master": Degree.MASTER,
+    "phd": Degree.PHD,
 }
 
-GOAL_ALIASES = {
-    "work": {"work", "job", "worker", "skilled_worker", "work_visa"},
-    "study": {"study", "student", "study_visa", "student_visa", "education"},
-    "family": {"family", "spouse", "marriage", "sponsorship", "family_visa"},
-}
+# Read-only: MatchAgent buckets its rules by these aliases in __init__
+GOAL_ALIASES = MappingProxyType({
+    goal: frozenset(sys.intern(alias) for alias in aliases)
+    for goal, aliases in {
+        "work": ("work", "job", "worker", "skilled_worker", "work_visa"),
+        "study": ("study", "student", "study_visa", "student_visa", "education"),
+        "family": ("family", "spouse", "marriage", "sponsorship", "family_visa"),
+    }.items()
+})
+
+# Profile fields that evaluate_all reads; results are cached on their values
+SCORING_FIELDS = ("age", "education_level", "ielts", "funds_usd", "work_experience_years", "goal")
+RESULT_CACHE_SIZE = 1024
+
+# Status label by status code (0/1/2), see MatchAgent._status_codes
+STATUS_LABELS = ("OK", "Borderline", "High Risk")
+
+# Columns of the per-rule threshold table (NaN = rule has no such threshold).
+# degree_rank is Degree.UNKNOWN (-1) for a degree not in DEGREE_ORDER.
+RULE_COLUMNS = ("min_age", "max_age", "degree_rank", "min_ielts", "min_funds", "min_years")
+
+
+@dataclass(slots=True)
+class PreparedRule:
+    """
+    Rule thresholds resolved once from the raw rule dict: key aliases
+    picked, degree normalized and ranked. Values are kept as in the rule
+    (None when absent) so gap messages read exactly as before.
+    """
+
+    country: Any
+    pathway: Any              # as written in the rule, reported in MatchResult
+    min_age: Any
+    max_age: Any
+    required_degree: str      # normalized, "" when the rule has none
+    required_rank: Degree     # UNKNOWN for a degree not in DEGREE_ORDER
+    min_ielts: Any
+    min_funds: Any
+    min_years: Any
+
+
+@dataclass(slots=True)
+class ProfileView:
+    """
+    The profile fields MatchAgent scores on, read once per evaluation so
+    the per-rule checks use attribute access instead of dict lookups.
+    """
+
+    age: Any
+    degree: str               # normalized education_level, "" when absent
+    degree_rank: Degree       # UNKNOWN for a degree not in DEGREE_ORDER
+    ielts: Any
+    funds: Any
+    years: Any
+
+
+def results_to_array(results: List[Dict[str, Any]]) -> np.ndarray:
+    """
+    Columnar view of MatchResult dicts for bulk analysis.
+
+    Returns a structured array with fields country, pathway, status,
+    raw_score and missing_count; row i describes results[i], whose
+    variable-length rule_gaps stay in the dicts. Sorting or filtering is
+    then a single array op, e.g. results_to_array(r)["raw_score"].argsort().
+    """
+    countries = [str(r.get("country") or "") for r in results]
+    pathways = [str(r.get("pathway") or "") for r in results]
+    dtype = np.dtype([
+        ("country", f"U{max(map(len, countries), default=1)}"),
+        ("pathway", f"U{max(map(len, pathways), default=1)}"),
+        ("status", f"U{max(map(len, STATUS_LABELS))}"),
+        ("raw_score", np.float64),
+        ("missing_count", np.int16),
+    ])
+
+    array = np.empty(len(results), dtype=dtype)
+    array["country"] = countries
+    array["pathway"] = pathways
+    array["status"] = [r["status"] for r in results]
+    array["raw_score"] = [r["raw_score"] for r in results]
+    array["missing_count"] = [
+        len(r.get("rule_gaps", {}).get("missing_requirements", ())) for r in results
+    ]
+    return array
+
+
+def _copy_results(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Copies of MatchResult dicts down to the gap lists, so cached results
+    never share mutable state with what callers receive.
+    """
+    return [
+        {
+            **result,
+            "rule_gaps": {
+                name: list(value) if isinstance(value, list) else value
+                for name, value in result["rule_gaps"].items()
+            },
+        }
+        for result in results
+    ]
+
+
+def _as_float(value: Any) -> float:
+    """
+    Threshold/profile value as float, with None → NaN.
+
+    Only real numbers are accepted (no "30" → 30.0), so anything the scalar
+    comparisons would reject is also rejected here. A NaN value is rejected
+    too: NaN already means "missing" in the table, while the scalar checks
+    treat a NaN value as present (every comparison False).
+    """
+    if value is None:
+        return np.nan
+    if not isinstance(value, (int, float)):
+        raise TypeError(f"expected a number, got {type(value).__name__}")
+    result = float(value)
+    if result != result:
+        raise ValueError("NaN is not a usable threshold/profile value")
+    return result
 
 
 class MatchAgent:
@@ -54,6 +188,8 @@ class MatchAgent:
             raise ValueError("Rules list cannot be empty")
 
         self.rules = rules
+        self._build_rule_table()
+        self._result_cache: "OrderedDict[Tuple[Any, ...], List[Dict[str, Any]]]" = OrderedDict()
 
         if logger is not None:
             self.logger = logger
@@ -65,9 +201,10 @@ class MatchAgent:
         # لاگ خیلی سطح بالا برای init
         if self.logger:
             self.logger.log_agent_call(
-                agent_name="MatchAgent.__init__",
-                session_id=None,
-                input_summary=f"rules_count={len(self.rules)}",
+                "MatchAgent.__init__",
+                None,
+                "rules_count=%d",
+                len(self.rules),
             )
 
     # -----------------------------------------
@@ -79,25 +216,168 @@ class MatchAgent:
             return ""
         return degree.lower().strip().replace(" ", "_")
 
-    def _score_single_rule(
+    def _build_rule_table(self) -> None:
+        """
+        Prepare every rule once: a PreparedRule per rule for the gap
+        messages, the thresholds as an (N, len(RULE_COLUMNS)) array so
+        evaluate_all scores every rule in a single vectorized pass, and rule
+        indices bucketed per goal for the goal filter.
+        """
+        table = np.full((len(self.rules), len(RULE_COLUMNS)), np.nan)
+        self._prepared: List[Optional[PreparedRule]] = []
+        all_rows: List[int] = []
+        pathway_rows: Dict[str, List[int]] = {}
+        # Rules whose thresholds are not plain numbers: scored one by one
+        self._scalar_rows: set = set()
+
+        for i, rule in enumerate(self.rules):
+            try:
+                prepared = self._prepare_rule(rule)
+            except AttributeError:
+                # degree is not a string: this rule can never be scored
+                self._prepared.append(None)
+                continue
+            self._prepared.append(prepared)
+            all_rows.append(i)
+
+            try:
+                table[i] = self._rule_thresholds(prepared)
+            except (TypeError, ValueError):
+                self._scalar_rows.add(i)
+            pathway = sys.intern((rule.get("pathway") or "").strip().lower())
+            pathway_rows.setdefault(pathway, []).append(i)
+
+        self._rule_table = table
+        self._all_rows = np.array(all_rows, dtype=np.intp)
+
+        # Goal → rows passing its filter, so evaluate_all never scans rules
+        # of other pathways. قوانین بدون pathway همیشه بررسی می‌شوند
+        self._goal_rows: Dict[str, np.ndarray] = {}
+        for goal, aliases in GOAL_ALIASES.items():
+            rows = list(pathway_rows.get("", ()))
+            for alias in aliases:
+                rows.extend(pathway_rows.get(alias, ()))
+            rows.sort()
+            self._goal_rows[goal] = np.array(rows, dtype=np.intp)
+
+    def _prepare_rule(self, rule: Dict[str, Any]) -> PreparedRule:
+        """Resolve the aliased threshold keys of one rule."""
+        degree = self._normalize_degree(
+            rule.get("min_degree") or rule.get("minimum_degree", "")
+        )
+        return PreparedRule(
+            country=rule.get("country"),
+            pathway=rule.get("pathway"),
+            min_age=rule.get("minimum_age") or None,
+            max_age=rule.get("maximum_age") or rule.get("age_max") or None,
+            required_degree=degree,
+            required_rank=DEGREE_ORDER.get(degree, Degree.UNKNOWN),
+            min_ielts=rule.get("min_ielts") or rule.get("minimum_ielts"),
+            min_funds=(
+                rule.get("min_funds_usd")
+                or rule.get("minimum_funds_usd")
+                or rule.get("minimum_income_usd")
+            ),
+            min_years=(
+                rule.get("work_experience_min_years")
+                or rule.get("minimum_work_experience_years")
+            ),
+        )
+
+    @staticmethod
+    def _rule_thresholds(rule: PreparedRule) -> Tuple[float, ...]:
+        """One row of the rule table, in RULE_COLUMNS order."""
+        return (
+            _as_float(rule.min_age),
+            _as_float(rule.max_age),
+            float(rule.required_rank) if rule.required_degree else np.nan,
+            _as_float(rule.min_ielts),
+            _as_float(rule.min_funds),
+            _as_float(rule.min_years),
+        )
+
+    def _candidate_rows(self, goal: str) -> np.ndarray:
+        """
+        Indices of the rules that pass the goal filter, in rule order
+        (all rules for an empty or unknown goal).
+        """
+        return self._goal_rows.get(goal, self._all_rows)
+
+    @staticmethod
+    def _scoring_key(profile: Dict[str, Any]) -> Optional[Tuple[Any, ...]]:
+        """
+        Cache key for evaluate_all: the SCORING_FIELDS values with their
+        types (30 and 30.0 compare equal but read differently in the gap
+        messages). None when a value is unhashable.
+        """
+        key = tuple(
+            (type(value), value)
+            for value in map(profile.get, SCORING_FIELDS)
+        )
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def _profile_view(self, profile: Dict[str, Any]) -> ProfileView:
+        """
+        Read the scoring fields once; the degree is normalized and ranked
+        here so the per-rule checks only compare ints.
+
+        Raises AttributeError when education_level is not a string.
+        """
+        degree = self._normalize_degree(profile.get("education_level", ""))
+        return ProfileView(
+            age=profile.get("age"),
+            degree=degree,
+            degree_rank=DEGREE_ORDER.get(degree, Degree.UNKNOWN),
+            ielts=profile.get("ielts"),
+            funds=profile.get("funds_usd"),
+            years=profile.get("work_experience_years"),
+        )
+
+    @staticmethod
+    def _profile_vector(view: ProfileView) -> Tuple[float, ...]:
+        """
+        Scoring fields of the profile in penalty_counts order.
+
+        Raises for non-numeric values; the profile is then scored rule by
+        rule.
+        """
+        return (
+            _as_float(view.age),
+            float(view.degree_rank) if view.degree else np.nan,
+            _as_float(view.ielts),
+            _as_float(view.funds),
+            _as_float(view.years),
+        )
+
+    def _status_codes(self, scores: np.ndarray) -> np.ndarray:
+        """Index into STATUS_LABELS for each score."""
+        return np.where(
+            scores >= self.SCORE_OK, 0, np.where(scores >= self.SCORE_BORDERLINE, 1, 2)
+        )
+
+    def _rule_gaps(
         self,
-        profile: Dict[str, Any],
-        rule: Dict[str, Any],
-    ) -> Tuple[str, float, Dict[str, Any]]:
+        view: ProfileView,
+        rule: PreparedRule,
+    ) -> Tuple[int, Dict[str, Any]]:
         """
         Compare profile against one rule.
 
         Returns:
-            (status, score, gaps)
+            (penalties, gaps)
         """
         missing: List[str] = []
         risks: List[str] = []
         penalties = 0
 
         # Age check
-        age = profile.get("age")
-        min_age = rule.get("minimum_age")
-        max_age = rule.get("maximum_age") or rule.get("age_max")
+        age = view.age
+        min_age = rule.min_age
+        max_age = rule.max_age
 
         if age is not None:
             if min_age and age < min_age:
@@ -108,14 +388,12 @@ class MatchAgent:
                 penalties += 1
 
         # Degree check
-        profile_degree = self._normalize_degree(profile.get("education_level", ""))
-        required_degree = self._normalize_degree(
-            rule.get("min_degree") or rule.get("minimum_degree", "")
-        )
+        profile_degree = view.degree
+        profile_rank = view.degree_rank
+        required_degree = rule.required_degree
 
         if profile_degree and required_degree:
-            profile_rank = DEGREE_ORDER.get(profile_degree, -1)
-            required_rank = DEGREE_ORDER.get(required_degree, -1)
+            required_rank = rule.required_rank
 
             if profile_rank < 0:
                 missing.append(f"Unknown degree level: {profile_degree}")
@@ -127,8 +405,8 @@ class MatchAgent:
                 penalties += 1
 
         # IELTS check
-        profile_ielts = profile.get("ielts")
-        required_ielts = rule.get("min_ielts") or rule.get("minimum_ielts")
+        profile_ielts = view.ielts
+        required_ielts = rule.min_ielts
 
         if required_ielts is not None:
             if profile_ielts is None:
@@ -141,12 +419,8 @@ class MatchAgent:
                 penalties += 1
 
         # Funds check
-        funds = profile.get("funds_usd")
-        required_funds = (
-            rule.get("min_funds_usd")
-            or rule.get("minimum_funds_usd")
-            or rule.get("minimum_income_usd")
-        )
+        funds = view.funds
+        required_funds = rule.min_funds
 
         if required_funds is not None:
             if funds is None:
@@ -165,11 +439,8 @@ class MatchAgent:
                     )
 
         # Work experience check
-        years = profile.get("work_experience_years")
-        required_years = (
-            rule.get("work_experience_min_years")
-            or rule.get("minimum_work_experience_years")
-        )
+        years = view.years
+        required_years = rule.min_years
 
         if required_years is not None:
             if years is None:
@@ -181,6 +452,29 @@ class MatchAgent:
                 )
                 penalties += 1
 
+        # Build gaps structure
+        gaps: Dict[str, Any] = {
+            "missing_requirements": missing,
+            "risk_status": "Risk" if risks else "No Risk",
+        }
+        if risks:
+            gaps["risks"] = risks
+
+        return penalties, gaps
+
+    def _score_single_rule(
+        self,
+        view: ProfileView,
+        rule: PreparedRule,
+    ) -> Tuple[str, float, Dict[str, Any]]:
+        """
+        Compare profile against one rule (scalar path).
+
+        Returns:
+            (status, score, gaps)
+        """
+        penalties, gaps = self._rule_gaps(view, rule)
+
         # Calculate final score
         score = max(0.0, 1.0 - penalties / self.MAX_PENALTIES)
 
@@ -192,31 +486,6 @@ class MatchAgent:
         else:
             status = "High Risk"
 
-        # Build gaps structure
-        gaps: Dict[str, Any] = {
-            "missing_requirements": missing,
-            "risk_status": "Risk" if risks else "No Risk",
-        }
-        if risks:
-            gaps["risks"] = risks
-
-        if self.logger:
-            try:
-                self.logger.log_tool_call(
-                    "MatchAgent._score_single_rule",
-                    {
-                        "country": rule.get("country"),
-                        "pathway": rule.get("pathway"),
-                        "status": status,
-                        "score": round(score, 3),
-                        "missing_count": len(missing),
-                        "risk_count": len(risks),
-                    },
-                )
-            except Exception:
-                # لاگ خودش نباید باعث کرش شود
-                pass
-
         return status, score, gaps
 
     # -----------------------------------------
@@ -237,62 +506,212 @@ class MatchAgent:
 
         # لاگ ورودی سطح بالا
         if self.logger:
-            summary = {
-                "goal": profile.get("goal"),
-                "age": profile.get("age"),
-                "citizenship": profile.get("citizenship"),
-            }
             self.logger.log_agent_call(
-                agent_name="MatchAgent.evaluate_all",
-                session_id=None,
-                input_summary=str(summary),
+                "MatchAgent.evaluate_all",
+                None,
+                "goal=%s, age=%s, citizenship=%s",
+                profile.get("goal"),
+                profile.get("age"),
+                profile.get("citizenship"),
             )
 
         raw_goal = profile.get("goal") or ""
         goal = raw_goal.strip().lower()
-        goal_aliases = GOAL_ALIASES.get(goal)
-
-        results: List[Dict[str, Any]] = []
 
-        for rule in self.rules:
-            pathway_raw = rule.get("pathway")
-            pathway = (pathway_raw or "").strip().lower()
+        key = self._scoring_key(profile)
+        cached = self._result_cache.get(key) if key is not None else None
+        if cached is not None:
+            self._result_cache.move_to_end(key)
+            results = _copy_results(cached)
+        else:
+            results = self._evaluate_profile(profile, self._candidate_rows(goal))
 
-            # فقط وقتی فیلتر کنیم که هم goal و هم pathway معنی‌دار باشند
-            if goal and pathway and goal_aliases:
-                if pathway not in goal_aliases:
-                    continue
+            if key is not None:
+                self._result_cache[key] = _copy_results(results)
+                if len(self._result_cache) > RESULT_CACHE_SIZE:
+                    self._result_cache.popitem(last=False)
 
+        if self.logger:
             try:
-                status, score, gaps = self._score_single_rule(profile, rule)
+                self.logger.log_tool_call(
+                    "MatchAgent.evaluate_all.result",
+                    {
+                        "matches_count": len(results),
+                        "goal": goal,
+                        "by_status": dict(Counter(r["status"] for r in results)),
+                    },
+                )
+            except Exception:
+                pass
 
-                result = {
-                    "country": rule.get("country"),
-                    "pathway": pathway_raw,
-                    "status": status,
-                    "raw_score": score,
-                    "rule_gaps": gaps,
-                }
-                results.append(result)
+        return results
 
-            except Exception as e:
-                if self.logger:
-                    self.logger.log_exception(
-                        error=e,
-                        context=f"MatchAgent.evaluate_all {rule.get('country')}/{pathway_raw}",
-                    )
-                continue
+    def evaluate_batch(self, profiles: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """
+        Evaluate many profiles against all rules.
+
+        Same results as calling evaluate_all on each profile, but the failed
+        checks of every (profile, rule) pair are counted in one broadcast
+        (K, N) array pass.
+
+        Args:
+            profiles: User profile dicts
+
+        Returns:
+            One list of MatchResult dicts per profile, in input order
+        """
+        if any(not profile for profile in profiles):
+            raise ValueError("Profile cannot be empty")
+
+        if self.logger:
+            self.logger.log_agent_call(
+                "MatchAgent.evaluate_batch",
+                None,
+                "profiles_count=%d",
+                len(profiles),
+            )
+
+        # Profiles with non-numeric fields go through _evaluate_profile
+        views: Dict[int, ProfileView] = {}
+        vectors: Dict[int, Tuple[float, ...]] = {}
+        for k, profile in enumerate(profiles):
+            try:
+                views[k] = self._profile_view(profile)
+                vectors[k] = self._profile_vector(views[k])
+            except (AttributeError, TypeError, ValueError):
+                pass
+
+        if vectors:
+            # (5, K, 1) columns against (N,) thresholds → (K, N) penalties
+            columns = np.array(list(vectors.values())).T[:, :, np.newaxis]
+            penalty_matrix = penalty_counts_np(tuple(columns), self._rule_table)
+            matrix_row = dict(zip(vectors, range(len(vectors))))
+
+        batch: List[List[Dict[str, Any]]] = []
+        for k, profile in enumerate(profiles):
+            goal = (profile.get("goal") or "").strip().lower()
+            rows = self._candidate_rows(goal)
+            if k in vectors:
+                penalties = penalty_matrix[matrix_row[k], rows]
+                batch.append(self._evaluate_rows(views[k], rows, penalties))
+            else:
+                batch.append(self._evaluate_profile(profile, rows))
 
         if self.logger:
             try:
                 self.logger.log_tool_call(
-                    "MatchAgent.evaluate_all.result",
+                    "MatchAgent.evaluate_batch.result",
                     {
-                        "matches_count": len(results),
-                        "goal": goal,
+                        "profiles_count": len(profiles),
+                        "matches_count": sum(len(results) for results in batch),
+                        "by_status": dict(
+                            Counter(r["status"] for results in batch for r in results)
+                        ),
                     },
                 )
             except Exception:
                 pass
 
+        return batch
+
+    def _evaluate_profile(
+        self,
+        profile: Dict[str, Any],
+        rows: np.ndarray,
+    ) -> List[Dict[str, Any]]:
+        """Score one profile against the given rules."""
+        try:
+            view = self._profile_view(profile)
+        except AttributeError as e:
+            # education_level is not a string: no rule can be checked
+            if self.logger:
+                self.logger.log_exception(e, "MatchAgent.evaluate_all education_level")
+            return []
+
+        try:
+            values = self._profile_vector(view)
+        except (TypeError, ValueError):
+            return self._evaluate_rows_scalar(view, rows)
+
+        penalties = penalty_counts(values, self._rule_table[rows])
+        return self._evaluate_rows(view, rows, penalties)
+
+    def _evaluate_rows(
+        self,
+        view: ProfileView,
+        rows: np.ndarray,
+        penalties: np.ndarray,
+    ) -> List[Dict[str, Any]]:
+        """
+        Turn the failed-check counts of the given rules into MatchResults;
+        gap messages are only built for the rules with at least one.
+        """
+        scores = np.maximum(0.0, 1.0 - penalties / self.MAX_PENALTIES)
+        codes = self._status_codes(scores)
+
+        results: List[Dict[str, Any]] = []
+        for i, pen, score, code in zip(
+            rows.tolist(), penalties.tolist(), scores.tolist(), codes.tolist()
+        ):
+            rule = self._prepared[i]
+            if i in self._scalar_rows:
+                try:
+                    status, score, gaps = self._score_single_rule(view, rule)
+                except Exception as e:
+                    self._log_rule_error(e, rule)
+                    continue
+                results.append(self._match_result(rule, status, score, gaps))
+                continue
+
+            if pen:
+                try:
+                    _, gaps = self._rule_gaps(view, rule)
+                except Exception as e:
+                    self._log_rule_error(e, rule)
+                    continue
+            else:
+                gaps = {"missing_requirements": [], "risk_status": "No Risk"}
+
+            status = STATUS_LABELS[code]
+            results.append(self._match_result(rule, status, score, gaps))
+        return results
+
+    def _evaluate_rows_scalar(
+        self,
+        view: ProfileView,
+        rows: np.ndarray,
+    ) -> List[Dict[str, Any]]:
+        """Rule-by-rule scoring, for profiles with non-numeric fields."""
+        results: List[Dict[str, Any]] = []
+        for i in rows.tolist():
+            rule = self._prepared[i]
+            try:
+                status, score, gaps = self._score_single_rule(view, rule)
+            except Exception as e:
+                self._log_rule_error(e, rule)
+                continue
+            results.append(self._match_result(rule, status, score, gaps))
         return results
+
+    @staticmethod
+    def _match_result(
+        rule: PreparedRule,
+        status: str,
+        score: float,
+        gaps: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        """MatchResult dict for one scored rule."""
+        return {
+            "country": rule.country,
+            "pathway": rule.pathway,
+            "status": status,
+            "raw_score": score,
+            "rule_gaps": gaps,
+        }
+
+    def _log_rule_error(self, error: Exception, rule: PreparedRule) -> None:
+        if self.logger:
+            self.logger.log_exception(
+                error=error,
+                context=f"MatchAgent.evaluate_all {rule.country}/{rule.pathway}",
+            )
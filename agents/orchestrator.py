@@ -83,7 +83,8 @@ class Orchestrator:
             self.logger.log_agent_call(
                 "Orchestrator.__init__",
                 None,
-                f"Loaded rules: {len(country_rules)}, Tools: 3",
+                "Loaded rules: %d, Tools: 3",
+                len(country_rules),
             )
 
         print("✅ Orchestrator initialized with all agents and tools!")
@@ -197,7 +198,8 @@ class Orchestrator:
             self.logger.log_agent_call(
                 "Orchestrator.process",
                 None,
-                f"query={query[:100] if query else 'none'}",
+                "query=%s",
+                query[:100] if query else "none",
             )
 
         # Build raw text for ProfileAgent
@@ -219,12 +221,13 @@ class Orchestrator:
             logger=self.logger,
         )
         ranking = cf.rank_countries()
+        ranking_model = self._convert_ranking_to_model(ranking)
+        self.explain_agent.prewarm_search(ranking_model)
         recommended = cf.get_top_recommendation()
 
         # Step 4: explanation
         print("📝 Step 4/4: Generating explanation...")
         profile_model = self._convert_profile_to_model(profile)
-        ranking_model = self._convert_ranking_to_model(ranking)
         explanation = self.explain_agent.generate_explanation(
             profile_model,
             ranking_model,
@@ -268,11 +271,12 @@ class Orchestrator:
             logger=self.logger,
         )
         ranking = cf.rank_countries()
+        ranking_model = self._convert_ranking_to_model(ranking)
+        self.explain_agent.prewarm_search(ranking_model)
         recommended = cf.get_top_recommendation()
 
         print("📝 Step 4/4: Generating explanation...")
         profile_model = self._convert_profile_to_model(profile)
-        ranking_model = self._convert_ranking_to_model(ranking)
         explanation = self.explain_agent.generate_explanation(
             profile_model,
             ranking_model,
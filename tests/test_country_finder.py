@@ -521,6 +521,73 @@ def test_edge_cases():
     print()
 
 
+def test_ranking_cache():
+    """Test that rankings are cached until invalidate() is called."""
+    print("="*70)
+    print("TEST 9: Ranking Cache")
+    print("="*70)
+    
+    match_results = [
+        {
+            "country": "Germany",
+            "status": "OK",
+            "raw_score": 0.90,
+            "rule_gaps": {"missing_requirements": []}
+        }
+    ]
+    
+    user_profile = {"age": 27, "ielts": 6.5, "german_level": "B2"}
+    
+    finder = CountryFinderAgent(match_results, user_profile)
+    first = finder.rank_countries()
+    assert finder.rank_countries() is first, "Second call should hit the cache"
+    print("✅ Repeated rank_countries() returns cached ranking")
+    
+    user_profile["german_level"] = "none"
+    finder.invalidate()
+    second = finder.rank_countries()
+    assert second is not first, "invalidate() should drop the cached ranking"
+    assert second["scores"]["Germany"] < first["scores"]["Germany"], (
+        "Recomputed ranking should reflect the mutated profile"
+    )
+    print(f"✅ invalidate() recomputes: {first['scores']['Germany']} → {second['scores']['Germany']}")
+    
+    print()
+
+
+def test_vector_matches_scalar():
+    """Test that rank_countries() and _calculate_final_score() round alike."""
+    print("="*70)
+    print("TEST 10: Vector vs Scalar Scores")
+    print("="*70)
+    
+    # Raw weighted score sits on a rounding half: round() gives 62.65,
+    # np.round() would give 62.64
+    match_result = {
+        "country": "Netherlands",
+        "pathway": "Work",
+        "status": "High Risk",
+        "raw_score": 0.693,
+        "rule_gaps": {"missing_requirements": ["IELTS", "Age"]}
+    }
+    
+    user_profile = {
+        "age": 28,
+        "ielts": 6.5,
+        "funds_usd": 0,
+        "cefr_level": "C1",
+        "french_level": "B1"
+    }
+    
+    finder = CountryFinderAgent([match_result], user_profile)
+    scalar = finder._calculate_final_score(match_result)
+    ranked = finder.rank_countries()["scores"]["Netherlands"]
+    assert scalar == ranked == 62.65, f"Expected 62.65, got {scalar} / {ranked}"
+    print(f"✅ Scalar and ranked scores agree: {ranked}")
+    
+    print()
+
+
 def run_all_tests():
     """Run all CountryFinderAgent tests."""
     print("\n" + "="*70)
@@ -536,6 +603,8 @@ def run_all_tests():
         ("Rank Countries", test_rank_countries),
         ("Top Recommendation", test_top_recommendation),
         ("Edge Cases", test_edge_cases),
+        ("Ranking Cache", test_ranking_cache),
+        ("Vector vs Scalar Scores", test_vector_matches_scalar),
     ]
     
     passed = 0
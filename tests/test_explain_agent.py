@@ -1,6 +1,12 @@
+import asyncio
+import os
+import threading
+import time
 import unittest
-from unittest.mock import Mock
-from agents.explain_agent import ExplainAgent
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+import agents.explain_agent as explain_module
+from agents.explain_agent import ExplainAgent, BATCH_SEPARATOR, _prompt_cache_key
 from schemas.user_profile import UserProfile, PersonalInfo, Education, WorkExperience, LanguageProficiency, FinancialInfo
 from schemas.country_ranking import CountryRanking, RankedCountry
 from memory.session_service import SessionService
@@ -74,5 +80,227 @@ class TestExplainAgent(unittest.TestCase):
         self.assertIn("Dear John", explanation) # Check for a string specific to the fallback template
         self.assertIn("Canada - Work Pathway", explanation)
 
+
+class FakeModel:
+    """Stands in for a Gemini GenerativeModel; reply(prompt) gives the text."""
+
+    def __init__(self, reply=lambda prompt: "Gemini says hi"):
+        self.reply = reply
+        self.prompts = []
+        self._lock = threading.Lock()
+
+    def _record(self, prompt):
+        with self._lock:
+            self.prompts.append(prompt)
+        return self.reply(prompt)
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        text = self._record(prompt)
+        if stream:
+            return [SimpleNamespace(text=text[i:i + 5]) for i in range(0, len(text), 5)]
+        return SimpleNamespace(text=text)
+
+    async def generate_content_async(self, prompt, stream=False, **kwargs):
+        text = self._record(prompt)
+        if stream:
+            async def chunks():
+                for i in range(0, len(text), 5):
+                    yield SimpleNamespace(text=text[i:i + 5])
+            return chunks()
+        return SimpleNamespace(text=text)
+
+
+class FakeSearchTool:
+    """Mock-mode SearchTool that counts calls (optionally slow or failing)."""
+
+    search_func = None
+
+    def __init__(self, delay=0.0, fail=False):
+        self.delay = delay
+        self.fail = fail
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def search_immigration(self, query, country, pathway, max_results):
+        with self._lock:
+            self.calls.append((country, pathway))
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("search backend down")
+        return [{"title": f"{country} visa", "snippet": f"Latest {country} rules"}]
+
+
+def make_profile(first_name="John", funds=50000, ielts=7.0):
+    return UserProfile(
+        personal_info=PersonalInfo(
+            first_name=first_name,
+            last_name="Doe",
+            age=30,
+            nationality="Iranian",
+            current_residence="Iran",
+            marital_status="single"
+        ),
+        education=Education(degree_level="bachelor", field_of_study="Computer Science"),
+        work_experience=WorkExperience(occupation="Software Engineer", years_of_experience=5),
+        language_proficiency=LanguageProficiency(ielts_score=ielts),
+        financial_info=FinancialInfo(liquid_assets_usd=funds),
+        immigration_goal="Work"
+    )
+
+
+def make_ranking(*scores):
+    countries = ["Canada", "Germany", "Spain", "Portugal"]
+    return CountryRanking(
+        ranked_countries=[
+            RankedCountry(country=country, pathway="Work", score=score)
+            for country, score in zip(countries, scores)
+        ]
+    )
+
+
+OFFLINE_RANKING = make_ranking(95, 85)   # clear winner → template
+FLASH_RANKING = make_ranking(80, 50)     # wide lead → flash model
+PRO_RANKING = make_ranking(80, 75)       # close call → pro model
+
+
+class TestExplainAgentBehaviour(unittest.TestCase):
+    """Routing, caching, batching and fallbacks with a fake Gemini and SearchTool."""
+
+    def setUp(self):
+        explain_module._SEARCH_CACHE.clear()
+        self.search_tool = FakeSearchTool()
+        with patch.dict(os.environ, {"GEMINI_API_KEY": ""}):
+            self.agent = ExplainAgent(None, self.search_tool)
+        self.pro = FakeModel(lambda prompt: "Pro explanation")
+        self.flash = FakeModel(lambda prompt: "Flash explanation")
+        self.agent.gemini_enabled = True
+        self.agent.gemini_model = self.pro
+        self.agent.gemini_flash_model = self.flash
+
+    def test_route_tiers(self):
+        self.assertEqual(self.agent._route(OFFLINE_RANKING), "offline")
+        self.assertEqual(self.agent._route(make_ranking(80)), "flash")
+        self.assertEqual(self.agent._route(FLASH_RANKING), "flash")
+        self.assertEqual(self.agent._route(PRO_RANKING), "pro")
+
+    def test_generate_uses_routed_model(self):
+        self.assertEqual(self.agent.generate_explanation(make_profile(), PRO_RANKING), "Pro explanation")
+        self.assertEqual(self.agent.generate_explanation(make_profile(), FLASH_RANKING), "Flash explanation")
+        offline = self.agent.generate_explanation(make_profile(), OFFLINE_RANKING)
+        self.assertIn("Immigration Recommendation for John", offline)
+        self.assertEqual((len(self.pro.prompts), len(self.flash.prompts)), (1, 1))
+
+    def test_cache_key_buckets_near_duplicates(self):
+        key = _prompt_cache_key(make_profile(funds=50000, ielts=7.0), PRO_RANKING)
+        self.assertEqual(key, _prompt_cache_key(make_profile(funds=50200, ielts=7.1), PRO_RANKING))
+        self.assertNotEqual(key, _prompt_cache_key(make_profile(funds=51000), PRO_RANKING))
+        self.assertNotEqual(key, _prompt_cache_key(make_profile(), FLASH_RANKING))
+
+    def test_memory_cache_hit_skips_gemini(self):
+        first = self.agent.generate_explanation(make_profile(), PRO_RANKING)
+        second = self.agent.generate_explanation(make_profile(funds=50100), PRO_RANKING)
+        self.assertEqual(first, second)
+        self.assertEqual(len(self.pro.prompts), 1)
+
+        self.agent.generate_explanation(make_profile(), PRO_RANKING, bypass_cache=True)
+        self.assertEqual(len(self.pro.prompts), 2)
+
+    def test_empty_reply_falls_back_and_is_not_cached(self):
+        self.pro.reply = lambda prompt: ""
+        explanation = self.agent.generate_explanation(make_profile(), PRO_RANKING)
+        self.assertIn("Immigration Recommendation for John", explanation)
+        self.assertIsNone(self.agent._cached_response(_prompt_cache_key(make_profile(), PRO_RANKING)))
+
+        chunks = list(self.agent.generate_explanation_stream(make_profile(), PRO_RANKING))
+        self.assertEqual(len(chunks), 1)
+        self.assertIn("Immigration Recommendation for John", chunks[0])
+
+    def test_async_empty_reply_falls_back(self):
+        self.pro.reply = lambda prompt: ""
+        explanation = asyncio.run(self.agent.agenerate_explanation(make_profile(), PRO_RANKING))
+        self.assertIn("Immigration Recommendation for John", explanation)
+
+    def test_stream_yields_gemini_chunks(self):
+        chunks = list(self.agent.generate_explanation_stream(make_profile(), PRO_RANKING))
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual("".join(chunks), "Pro explanation")
+
+    def test_batch_routes_like_single_calls(self):
+        self.pro.reply = lambda prompt: (
+            f"\n{BATCH_SEPARATOR}\n".join(["Batch A", "Batch B"])
+            if BATCH_SEPARATOR in prompt else "Pro explanation"
+        )
+        requests = [
+            (make_profile("Ann"), PRO_RANKING),
+            (make_profile("Bob"), OFFLINE_RANKING),
+            (make_profile("Cat"), FLASH_RANKING),
+            (make_profile("Dan"), PRO_RANKING),
+            (make_profile("Eve"), CountryRanking(ranked_countries=[])),
+        ]
+        outputs = self.agent.generate_explanations_batch(requests)
+
+        self.assertEqual(outputs[0], "Batch A")
+        self.assertEqual(outputs[3], "Batch B")
+        self.assertIn("Immigration Recommendation for Bob", outputs[1])
+        self.assertEqual(outputs[2], "Flash explanation")
+        self.assertIn("No recommended countries", outputs[4])
+        self.assertEqual(len(self.pro.prompts), 1, "Only pro-routed users share the batch call")
+        self.assertEqual(len(self.flash.prompts), 1)
+
+    def test_batch_mismatch_falls_back_to_single_calls(self):
+        requests = [(make_profile("Ann"), PRO_RANKING), (make_profile("Dan"), PRO_RANKING)]
+        outputs = self.agent.generate_explanations_batch(requests)
+        self.assertEqual(outputs, ["Pro explanation", "Pro explanation"])
+        self.assertEqual(len(self.pro.prompts), 3, "One batch call, then one call per user")
+
+    def test_cached_variant_refreshes_in_background(self):
+        first = self.agent.generate_explanation_cached(make_profile(), PRO_RANKING)
+        self.assertIn("Immigration Recommendation for John", first)
+
+        deadline = time.monotonic() + 5
+        while self.agent._refreshing and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(
+            self.agent.generate_explanation_cached(make_profile(), PRO_RANKING),
+            "Pro explanation",
+        )
+        self.assertEqual(len(self.pro.prompts), 1)
+
+    def test_search_results_are_cached(self):
+        first = self.agent._visa_search("Canada", "Work")
+        self.assertEqual(first, self.agent._visa_search("Canada", "Work"))
+        self.assertEqual(len(self.search_tool.calls), 1)
+
+    def test_failed_search_is_retried_after_failure_ttl(self):
+        self.search_tool.fail = True
+        self.assertEqual(self.agent._visa_search("Canada", "Work"), [])
+        self.assertEqual(self.agent._visa_search("Canada", "Work"), [])
+        self.assertEqual(len(self.search_tool.calls), 1, "Failure is remembered")
+
+        self.search_tool.fail = False
+        with patch.object(explain_module.time, "monotonic", return_value=time.monotonic() + 61):
+            results = self.agent._visa_search("Canada", "Work")
+        self.assertEqual(len(results), 1)
+        self.assertEqual(len(self.search_tool.calls), 2)
+
+    def test_prewarm_searches_what_the_route_reads(self):
+        self.search_tool.delay = 0.2
+        self.agent.prewarm_search(OFFLINE_RANKING)
+        time.sleep(0.05)
+        # joins the prewarm still in flight instead of searching again
+        self.assertEqual(len(self.agent._visa_search("Canada", "Work")), 1)
+        self.assertEqual(self.search_tool.calls, [("Canada", "Work")])
+        self.assertEqual(explain_module._SEARCH_IN_FLIGHT, {})
+
+        self.agent.prewarm_search(PRO_RANKING)
+        deadline = time.monotonic() + 5
+        while len(explain_module._SEARCH_CACHE) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(
+            sorted(country for country, _ in self.search_tool.calls),
+            ["Canada", "Germany"],
+        )
+
+
 if __name__ == '__main__':
     unittest.main()
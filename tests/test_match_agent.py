@@ -7,7 +7,7 @@ PROJECT_ROOT = Path(__file__).parent.parent
 sys.path.insert(0, str(PROJECT_ROOT))
 
 import json
-from agents.match_agent import MatchAgent
+from agents.match_agent import MatchAgent, results_to_array
 
 
 # Find rules path
@@ -201,6 +201,102 @@ def _scenario_all_pathways():
     print("[PASS] Test 4 Passed")
 
 
+def _scenario_batch_matches_single():
+    """Scenario 5: evaluate_batch gives the same results as evaluate_all."""
+    print("\n" + "=" * 60)
+    print("TEST 5: Batch Evaluation")
+    print("=" * 60)
+
+    rules_list = load_rules()
+    agent = MatchAgent(rules_list)
+
+    profiles = [
+        {
+            "age": 27,
+            "education_level": "bachelor",
+            "ielts": 6.5,
+            "funds_usd": 18000,
+            "work_experience_years": 3,
+            "goal": "Study",
+        },
+        {"age": 30, "education_level": "master", "goal": "Work"},
+        {"age": 45, "education_level": "diploma", "ielts": 5.0, "funds_usd": 2000},
+    ]
+
+    batch = agent.evaluate_batch(profiles)
+
+    assert len(batch) == len(profiles), "One result list per profile expected"
+    for profile, results in zip(profiles, batch):
+        assert results == agent.evaluate_all(profile), (
+            f"Batch result differs from evaluate_all for {profile}"
+        )
+        print(f"\n{profile.get('goal', '-')}: {len(results)} matches")
+
+    print("[PASS] Test 5 Passed")
+
+
+def _scenario_results_array():
+    """Scenario 6: columnar view lines up with the MatchResult dicts."""
+    print("\n" + "=" * 60)
+    print("TEST 6: Results As Structured Array")
+    print("=" * 60)
+
+    rules_list = load_rules()
+    agent = MatchAgent(rules_list)
+    results = agent.evaluate_all(
+        {"age": 29, "education_level": "bachelor", "ielts": 6.0, "funds_usd": 9000}
+    )
+
+    array = results_to_array(results)
+
+    assert len(array) == len(results), "One row per MatchResult expected"
+    for row, result in zip(array, results):
+        assert row["country"] == result["country"], "Country mismatch"
+        assert row["status"] == result["status"], "Status mismatch"
+        assert row["raw_score"] == result["raw_score"], "Score mismatch"
+        assert row["missing_count"] == len(
+            result["rule_gaps"]["missing_requirements"]
+        ), "missing_count mismatch"
+
+    best = results[int(array["raw_score"].argmax())]
+    print(f"\nBest: {best['country']} ({best['pathway']}) {best['raw_score']:.2f}")
+    assert len(results_to_array([])) == 0, "Empty results give an empty array"
+
+    print("[PASS] Test 6 Passed")
+
+
+def _scenario_nan_profile_value():
+    """Scenario 7: a NaN profile value is scored like the per-rule checks."""
+    print("\n" + "=" * 60)
+    print("TEST 7: NaN Profile Value")
+    print("=" * 60)
+
+    rules_list = load_rules()
+    agent = MatchAgent(rules_list)
+    profile = {
+        "age": 27,
+        "education_level": "bachelor",
+        "ielts": float("nan"),
+        "funds_usd": 18000,
+        "work_experience_years": 3,
+        "goal": "Study",
+    }
+
+    results = agent.evaluate_all(profile)
+    view = agent._profile_view(profile)
+    expected = agent._evaluate_rows_scalar(view, agent._candidate_rows("study"))
+
+    assert results == expected, "NaN profile should match the per-rule checks"
+    for result in results:
+        if result["raw_score"] < 1.0:
+            assert result["rule_gaps"]["missing_requirements"], (
+                f"Penalty without a gap message for {result['country']}"
+            )
+    print(f"\n{len(results)} matches, every penalty explained")
+
+    print("[PASS] Test 7 Passed")
+
+
 # --------------------------------------------------------------------
 # Pytest-facing test functions (must return None)
 # --------------------------------------------------------------------
@@ -222,6 +318,18 @@ def test_all_pathways():
     _scenario_all_pathways()
 
 
+def test_batch_matches_single():
+    _scenario_batch_matches_single()
+
+
+def test_results_array():
+    _scenario_results_array()
+
+
+def test_nan_profile_value():
+    _scenario_nan_profile_value()
+
+
 # --------------------------------------------------------------------
 # Manual runner
 # --------------------------------------------------------------------
@@ -238,6 +346,9 @@ def run_all_tests():
         _scenario_low_funds_profile()
         _scenario_missing_fields()
         _scenario_all_pathways()
+        _scenario_batch_matches_single()
+        _scenario_results_array()
+        _scenario_nan_profile_value()
 
         print("\n" + "=" * 60)
         print("ALL TESTS PASSED")
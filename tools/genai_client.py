@@ -0,0 +1,28 @@
+# tools/genai_client.py
+
+import threading
+
+_lock = threading.Lock()
+_configured_key = None
+
+# Per-request deadline for generate_content; a stalled backend raises
+# DeadlineExceeded instead of hanging, so callers fall back offline.
+GEMINI_TIMEOUT_SECONDS = 20.0
+GEMINI_REQUEST_OPTIONS = {"timeout": GEMINI_TIMEOUT_SECONDS}
+
+
+def configure_genai(genai, api_key: str) -> None:
+    """
+    Configure google.generativeai once per API key.
+
+    genai.configure() throws away the SDK's cached clients (and with them
+    the warm gRPC channel), so agents created later in the same process –
+    e.g. one Orchestrator per Streamlit session – must not call it again.
+    """
+    global _configured_key
+
+    with _lock:
+        if _configured_key == api_key:
+            return
+        genai.configure(api_key=api_key)
+        _configured_key = api_key
@@ -1,11 +1,42 @@
 # tools/logger.py
 
+import atexit
 import logging
+import logging.handlers
+import queue
 
 # 🔥 Global toggle for all logging
 LOGGING_ENABLED = True   # Set to False to disable logging everywhere
 
 
+_queue_listener = None
+
+
+def _start_queue_logging() -> logging.Logger:
+    """
+    Route "ImmigrationAI" records through a queue; a background
+    QueueListener does the actual stream writes, so callers never block on I/O.
+    """
+    global _queue_listener
+
+    logger = logging.getLogger("ImmigrationAI")
+    if _queue_listener is None:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter(
+            "%(asctime)s | %(levelname)s | %(message)s",
+            datefmt="%Y-%m-%d %H:%M:%S",
+        ))
+        log_queue = queue.SimpleQueue()
+        _queue_listener = logging.handlers.QueueListener(log_queue, handler)
+        _queue_listener.start()
+        atexit.register(_queue_listener.stop)   # flush pending records on exit
+
+        logger.addHandler(logging.handlers.QueueHandler(log_queue))
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    return logger
+
+
 class Logger:
     """
     Lightweight project-wide logger.
@@ -14,41 +45,50 @@ class Logger:
 
     def __init__(self):
         if LOGGING_ENABLED:
-            logging.basicConfig(
-                level=logging.INFO,
-                format="%(asctime)s | %(levelname)s | %(message)s",
-                datefmt="%Y-%m-%d %H:%M:%S",
-            )
-            self.logger = logging.getLogger("ImmigrationAI")
+            self.logger = _start_queue_logging()
         else:
             # No logger created when logging disabled
             self.logger = None
 
-    def log_agent_call(self, agent_name: str, session_id: str, input_summary: str):
-        if not LOGGING_ENABLED:
+    # Messages take %-style args and are only formatted when the record
+    # is actually emitted (disabled / filtered calls cost no formatting).
+    def is_enabled_for(self, level: int = logging.INFO) -> bool:
+        """Whether a record at this level would be emitted; callers can
+        skip building expensive log arguments when it would not."""
+        return LOGGING_ENABLED and self.logger.isEnabledFor(level)
+
+    def log_agent_call(self, agent_name: str, session_id: str, input_summary: str, *args):
+        if not self.is_enabled_for(logging.INFO):
             return
         session_id = session_id or "none"
+        if args:
+            input_summary = input_summary % args
         safe_summary = (input_summary or "")[:200]
         self.logger.info(
-            f"[Agent: {agent_name}] session={session_id} input='{safe_summary}'"
+            "[Agent: %s] session=%s input='%s'", agent_name, session_id, safe_summary
         )
 
+    def log_info(self, message: str, *args):
+        if not self.is_enabled_for(logging.INFO):
+            return
+        self.logger.info(message, *args)
+
     def log_tool_call(self, tool_name: str, params: dict):
-        if not LOGGING_ENABLED:
+        if not self.is_enabled_for(logging.INFO):
             return
-        self.logger.info(f"[Tool: {tool_name}] params={params}")
+        self.logger.info("[Tool: %s] params=%s", tool_name, params)
 
     def log_exception(self, error: Exception, context: str):
-        if not LOGGING_ENABLED:
+        if not self.is_enabled_for(logging.ERROR):
             return
-        self.logger.error(f"[Exception] context={context} error='{str(error)}'")
+        self.logger.error("[Exception] context=%s error='%s'", context, error)
 
     def log_api_call(self, api_name: str, duration: float, status: str):
-        if not LOGGING_ENABLED:
+        if not self.is_enabled_for(logging.INFO):
             return
         try:
             self.logger.info(
-                f"[API: {api_name}] duration={duration:.2f}s status={status}"
+                "[API: %s] duration=%.2fs status=%s", api_name, duration, status
             )
         except:
             pass
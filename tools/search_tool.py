@@ -34,6 +34,8 @@ try:
     import google.generativeai as genai
 except Exception:
     genai = None
+
+from tools.genai_client import GEMINI_REQUEST_OPTIONS, configure_genai
 # ==================================================
 
 
@@ -60,7 +62,7 @@ class SearchTool:
             api_key = os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_API_KEY")
             if genai is not None and api_key:
                 try:
-                    genai.configure(api_key=api_key)
+                    configure_genai(genai, api_key)
                     # مدل سبک برای سرچ
                     self.gemini_model = genai.GenerativeModel("gemini-1.5-flash")
                     self.search_func = self._gemini_search
@@ -185,7 +187,9 @@ Format EXACTLY as:
 """
 
         try:
-            resp = self.gemini_model.generate_content(prompt)
+            resp = self.gemini_model.generate_content(
+                prompt, request_options=GEMINI_REQUEST_OPTIONS
+            )
             text = getattr(resp, "text", None) or str(resp)
 
             data = json.loads(text)